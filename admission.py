@@ -0,0 +1,214 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lower number = served first
+LANES = {"interactive": 0, "batch": 1}
+
+# Sessions without a recognised tenant key all share this tenant's buckets
+DEFAULT_TENANT = "default"
+
+DEFAULT_QUOTAS = {
+    "interactive": {"rate": 2.0, "burst": 10},
+    "batch": {"rate": 5.0, "burst": 50},
+}
+
+
+class Overloaded(Exception):
+    def __init__(self, reason, retry_after=5.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def peek(self, n=1):
+        # Seconds until `n` tokens are available, without taking them. A request costing
+        # more than the burst only needs a full bucket and leaves the rest as debt.
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        need = min(n, self.burst)
+        if self.tokens >= need:
+            return 0.0
+        return (need - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def take(self, n=1):
+        # Returns 0 when admitted, otherwise the seconds until enough tokens refill
+        retry_after = self.peek(n)
+        if not retry_after:
+            self.tokens -= n
+        return retry_after
+
+
+class _LaneMetrics:
+    def __init__(self):
+        self.admitted = 0
+        self.shed = {}
+        self.waits = deque(maxlen=2048)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds):
+        self.admitted += 1
+        self.waits.append(seconds)
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def record_shed(self, reason):
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+
+    def snapshot(self):
+        waits = sorted(self.waits)
+        pct = lambda p: waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+        return {
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "wait_avg": self.total_wait / self.admitted if self.admitted else 0.0,
+            "wait_p50": pct(0.50),
+            "wait_p95": pct(0.95),
+            "wait_p99": pct(0.99),
+            "wait_max": self.max_wait,
+        }
+
+
+class AdmissionController:
+    # Gates CPU-bound renders: each tenant draws from its own token bucket per lane,
+    # admitted work queues by lane priority for a fixed number of render slots, and
+    # requests are shed early when their lane's queue is too long to finish in time.
+    # Batch work never holds every slot, so long packets cannot starve previews.
+    def __init__(self, max_concurrent=None, max_queue=None, max_wait=None, quotas=None, tenant_keys=None,
+                 lane_limits=None):
+        self.max_concurrent = max_concurrent or os.cpu_count() or 2
+        self.lane_limits = lane_limits or {"interactive": self.max_concurrent,
+                                           "batch": max(1, self.max_concurrent - 1)}
+        self.max_queue = max_queue or {"interactive": 4 * self.max_concurrent, "batch": 64}
+        self.max_wait = max_wait or {"interactive": 3.0, "batch": 60.0}
+        self.quotas = quotas if quotas is not None else _quotas_from_env()
+        self.tenant_keys = tenant_keys if tenant_keys is not None else _tenant_keys_from_env()
+        self.tenants = set(self.quotas) | set(self.tenant_keys.values()) | {DEFAULT_TENANT}
+        self._buckets = {}
+        self._admits = 0
+        self._waiting = []
+        self._queued = {lane: 0 for lane in LANES}
+        self._in_flight = 0
+        self._in_flight_by_lane = {lane: 0 for lane in LANES}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # Moving average of render time per lane drives that lane's expected-wait estimate
+        self._service_time = {lane: 0.5 for lane in LANES}
+        self.metrics_by_lane = {lane: _LaneMetrics() for lane in LANES}
+
+    def tenant_for_key(self, key):
+        # Tenants are configured server-side; an unknown or missing key gets the shared default
+        return self.tenant_keys.get(key or "", DEFAULT_TENANT)
+
+    def _bucket(self, tenant, lane):
+        if tenant not in self.tenants:
+            tenant = DEFAULT_TENANT
+        key = (tenant, lane)
+        if key not in self._buckets:
+            quota = self.quotas.get(tenant, {}).get(lane) or DEFAULT_QUOTAS[lane]
+            self._buckets[key] = TokenBucket(quota["rate"], quota["burst"])
+        return self._buckets[key]
+
+    def _prune_buckets(self):
+        # A bucket idle long enough to refill is the same as a fresh one
+        now = time.monotonic()
+        for key, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self._buckets[key]
+
+    def _has_slot(self, lane):
+        return self._in_flight < self.max_concurrent and self._in_flight_by_lane[lane] < self.lane_limits[lane]
+
+    def _shed(self, lane, reason, message, retry_after):
+        self.metrics_by_lane[lane].record_shed(reason)
+        raise Overloaded(message, retry_after)
+
+    @contextmanager
+    def admit(self, tenant, lane="interactive", cost=1):
+        # `cost` is charged against the tenant's quota, e.g. one token per candidate in a packet
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}'. Available: {', '.join(LANES)}")
+        enqueued = time.monotonic()
+        with self._cond:
+            self._admits += 1
+            if self._admits % 1024 == 0:
+                self._prune_buckets()
+            # Capacity checks come first so a request shed for load keeps its quota
+            bucket = self._bucket(tenant, lane)
+            ahead = sum(self._queued[name] * self._service_time[name] for name in LANES if LANES[name] <= LANES[lane])
+            if self._queued[lane] >= self.max_queue[lane]:
+                self._shed(lane, "queue_full", "The render queue is full.", ahead / self.lane_limits[lane])
+            expected_wait = (ahead + self._service_time[lane]) / self.lane_limits[lane]
+            if not self._has_slot(lane) and expected_wait > self.max_wait[lane]:
+                self._shed(lane, "expected_wait", "The render queue is too long.", expected_wait)
+            retry_after = bucket.take(cost)
+            if retry_after:
+                self._shed(lane, "quota", "Your organization has reached its rendering quota.", retry_after)
+
+            ticket = (LANES[lane], next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            self._queued[lane] += 1
+            deadline = enqueued + self.max_wait[lane]
+            try:
+                while not self._has_slot(lane) or self._waiting[0] != ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._cond.notify_all()
+                        self._shed(lane, "timeout", "Timed out waiting for a render slot.", self._service_time[lane])
+                    self._cond.wait(remaining)
+                heapq.heappop(self._waiting)
+            finally:
+                self._queued[lane] -= 1
+            self._in_flight += 1
+            self._in_flight_by_lane[lane] += 1
+            self.metrics_by_lane[lane].record_wait(time.monotonic() - enqueued)
+            self._cond.notify_all()
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._in_flight_by_lane[lane] -= 1
+                self._service_time[lane] = 0.8 * self._service_time[lane] + 0.2 * (time.monotonic() - started)
+                self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "in_flight_by_lane": dict(self._in_flight_by_lane),
+                "lane_limits": dict(self.lane_limits),
+                "queued": dict(self._queued),
+                "service_time": dict(self._service_time),
+                "lanes": {lane: m.snapshot() for lane, m in self.metrics_by_lane.items()},
+            }
+
+
+def _quotas_from_env():
+    # RESUME_TENANT_QUOTAS='{"acme": {"batch": {"rate": 1, "burst": 20}}}'
+    raw = os.environ.get('RESUME_TENANT_QUOTAS')
+    return json.loads(raw) if raw else {}
+
+
+def _tenant_keys_from_env():
+    # RESUME_TENANT_KEYS='{"<secret access key>": "acme"}'
+    raw = os.environ.get('RESUME_TENANT_KEYS')
+    return json.loads(raw) if raw else {}
@@ -1,7 +1,28 @@
 import streamlit as st
-from fpdf import FPDF
+import hmac
 import io
+import json
+import multiprocessing
+import os
+import uuid
 from datetime import datetime
+from urllib.parse import urlsplit
+from admission import AdmissionController, Overloaded
+from session_memory import MemoryGovernor
+from artifacts import ArtifactStore, serve_in_background
+from history import VersionStore, new_history_secret, user_key, describe_changes
+from rendering import PHOTOS, resume_digest, render_pdf_bytes
+from photos import UPLOADS_ENABLED as PHOTO_UPLOADS
+from template_registry import TemplateRegistry
+from render_workers import create_render_pool
+from render_cache import create_render_cache
+from packet import read_records, write_packet_file
+from search_index import SearchIndex, QueryError
+from generation import ContentGenerator, create_backend, summary_request, bullets_request
+try:
+    from suggestions import load_default_index, find_near_duplicates
+except ImportError:  # NumPy not installed - bullet suggestions are disabled
+    load_default_index = None
 
 # Page configuration
 st.set_page_config(page_title="Resume Generator", page_icon="📄", layout="wide")
@@ -41,553 +62,262 @@ if 'selected_template' not in st.session_state:
     st.session_state.selected_template = None
 if 'user_data' not in st.session_state:
     st.session_state.user_data = {}
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'history_secret' not in st.session_state:
+    # Version history belongs to whoever holds this secret. It rides in the ?resume= link,
+    # so a bookmarked page comes back to its own versions and no one else's.
+    secret = st.query_params.get('resume', '')
+    if len(secret) < 32:
+        secret = new_history_secret()
+        st.query_params['resume'] = secret
+    st.session_state.history_secret = secret
+if 'rendered_digest' not in st.session_state:
+    st.session_state.rendered_digest = None
+if 'artifact_digest' not in st.session_state:
+    st.session_state.artifact_digest = None
+if 'packet' not in st.session_state:
+    st.session_state.packet = None
+if 'search_packet' not in st.session_state:
+    st.session_state.search_packet = None
 
-# Template definitions
-TEMPLATES = {
-    "Professional": {
-        "name": "Professional",
-        "description": "Clean and professional design suitable for corporate roles",
-        "color": "#2C3E50"
-    },
-    "Modern": {
-        "name": "Modern",
-        "description": "Contemporary design with accent colors",
-        "color": "#3498DB"
-    },
-    "Creative": {
-        "name": "Creative",
-        "description": "Bold and creative layout for design roles",
-        "color": "#E74C3C"
-    },
-    "Minimal": {
-        "name": "Minimal",
-        "description": "Minimalist design with maximum readability",
-        "color": "#95A5A6"
-    },
-    "Executive": {
-        "name": "Executive",
-        "description": "Elegant design for senior positions",
-        "color": "#8E44AD"
-    }
-}
+@st.cache_resource
+def get_render_pool():
+    # Warm worker processes are created once per server process
+    return create_render_pool()
 
-class ResumePDF(FPDF):
-    def __init__(self, template_color):
-        super().__init__()
-        self.template_color = template_color
-        
-    def hex_to_rgb(self, hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def create_professional_resume(data):
-    pdf = ResumePDF(TEMPLATES["Professional"]["color"])
-    pdf.add_page()
-    color_rgb = pdf.hex_to_rgb(TEMPLATES["Professional"]["color"])
-    
-    # Header with background
-    pdf.set_fill_color(*color_rgb)
-    pdf.rect(0, 0, 210, 45, 'F')
-    
-    # Name
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_font('Arial', 'B', 24)
-    pdf.cell(0, 20, data.get('name', ''), 0, 1, 'C')
-    
-    # Contact Info
-    pdf.set_font('Arial', '', 10)
-    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
-    pdf.cell(0, 8, contact, 0, 1, 'C')
-    
-    if data.get('linkedin') or data.get('portfolio'):
-        links = f"{data.get('linkedin', '')}  {data.get('portfolio', '')}"
-        pdf.cell(0, 8, links, 0, 1, 'C')
-    
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(5)
-    
-    # Profile Summary
-    if data.get('summary'):
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'PROFESSIONAL SUMMARY', 0, 1, 'L', True)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, data['summary'])
-        pdf.ln(3)
-    
-    # Education
-    if data.get('education'):
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'EDUCATION', 0, 1, 'L', True)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        
-        for edu in data['education']:
-            if edu.get('degree'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 5, f"{edu.get('institution', '')} | {edu.get('year', '')}", 0, 1)
-                if edu.get('gpa'):
-                    pdf.cell(0, 5, f"GPA: {edu['gpa']}", 0, 1)
-                pdf.ln(2)
-    
-    # Experience
-    if data.get('experience'):
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'WORK EXPERIENCE', 0, 1, 'L', True)
-        pdf.set_text_color(0, 0, 0)
-        
-        for exp in data['experience']:
-            if exp.get('position'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, exp.get('position', ''), 0, 1)
-                pdf.set_font('Arial', 'I', 10)
-                pdf.cell(0, 5, f"{exp.get('company', '')} | {exp.get('duration', '')}", 0, 1)
-                pdf.set_font('Arial', '', 10)
-                if exp.get('description'):
-                    responsibilities = exp['description'].split('\n')
-                    for resp in responsibilities:
-                        if resp.strip():
-                            pdf.cell(5)
-                            pdf.multi_cell(0, 5, f"- {resp.strip()}")
-                pdf.ln(2)
-    
-    # Projects
-    if data.get('projects'):
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'PROJECTS', 0, 1, 'L', True)
-        pdf.set_text_color(0, 0, 0)
-        
-        for proj in data['projects']:
-            if proj.get('title'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, proj.get('title', ''), 0, 1)
-                pdf.set_font('Arial', '', 10)
-                if proj.get('description'):
-                    pdf.multi_cell(0, 5, proj['description'])
-                if proj.get('technologies'):
-                    pdf.set_font('Arial', 'I', 9)
-                    pdf.multi_cell(0, 5, f"Technologies: {proj['technologies']}")
-                pdf.ln(2)
-    
-    # Skills
-    if data.get('skills'):
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'SKILLS', 0, 1, 'L', True)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, data['skills'])
-    
-    return pdf
+@st.cache_resource
+def get_template_registry():
+    # Template files are re-read when they change, without restarting the app
+    return TemplateRegistry()
 
-def create_modern_resume(data):
-    pdf = ResumePDF(TEMPLATES["Modern"]["color"])
-    pdf.add_page()
-    color_rgb = pdf.hex_to_rgb(TEMPLATES["Modern"]["color"])
-    
-    # Left sidebar background
-    pdf.set_fill_color(*color_rgb)
-    pdf.rect(0, 0, 70, 297, 'F')
-    
-    # Name in sidebar
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_font('Arial', 'B', 20)
-    pdf.set_xy(5, 20)
-    pdf.multi_cell(60, 8, data.get('name', ''), 0, 'C')
-    
-    pdf.set_font('Arial', '', 9)
-    pdf.set_xy(5, 45)
-    
-    # Contact in sidebar
-    if data.get('phone'):
-        pdf.cell(60, 5, data['phone'], 0, 1, 'C')
-    if data.get('email'):
-        pdf.multi_cell(60, 5, data['email'], 0, 'C')
-    if data.get('location'):
-        pdf.set_xy(5, pdf.get_y())
-        pdf.multi_cell(60, 5, data['location'], 0, 'C')
-    
-    # Skills in sidebar
-    if data.get('skills'):
-        pdf.set_xy(5, pdf.get_y() + 10)
-        pdf.set_font('Arial', 'B', 11)
-        pdf.cell(60, 6, 'SKILLS', 0, 1, 'C')
-        pdf.set_font('Arial', '', 8)
-        skills_list = data['skills'].split(',')
-        for skill in skills_list[:8]:
-            pdf.set_x(5)
-            pdf.multi_cell(60, 5, f"- {skill.strip()}", 0, 'L')
-    
-    # Main content area
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_xy(75, 20)
-    
-    # Summary
-    if data.get('summary'):
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'PROFILE', 0, 1)
-        pdf.set_x(75)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, data['summary'])
-        pdf.ln(3)
-    
-    # Experience
-    if data.get('experience'):
-        pdf.set_x(75)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'EXPERIENCE', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for exp in data['experience']:
-            if exp.get('position'):
-                pdf.set_x(75)
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, exp.get('position', ''), 0, 1)
-                pdf.set_x(75)
-                pdf.set_font('Arial', 'I', 10)
-                pdf.cell(0, 5, f"{exp.get('company', '')} | {exp.get('duration', '')}", 0, 1)
-                pdf.set_x(75)
-                pdf.set_font('Arial', '', 9)
-                if exp.get('description'):
-                    for line in exp['description'].split('\n'):
-                        if line.strip():
-                            pdf.set_x(75)
-                            pdf.multi_cell(0, 5, f"- {line.strip()}")
-                pdf.ln(2)
-    
-    # Education
-    if data.get('education'):
-        pdf.set_x(75)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'EDUCATION', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for edu in data['education']:
-            if edu.get('degree'):
-                pdf.set_x(75)
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
-                pdf.set_x(75)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 5, f"{edu.get('institution', '')} | {edu.get('year', '')}", 0, 1)
-                pdf.ln(2)
-    
-    return pdf
+@st.cache_resource
+def get_render_cache():
+    # In-process LRU in front of a tier shared with the other replicas
+    return create_render_cache()
 
-def create_minimal_resume(data):
-    pdf = ResumePDF(TEMPLATES["Minimal"]["color"])
-    pdf.add_page()
-    
-    # Name
-    pdf.set_font('Arial', 'B', 28)
-    pdf.cell(0, 15, data.get('name', ''), 0, 1, 'C')
-    
-    # Contact
-    pdf.set_font('Arial', '', 10)
-    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
-    pdf.cell(0, 6, contact, 0, 1, 'C')
-    pdf.ln(5)
-    
-    # Horizontal line
-    pdf.set_draw_color(200, 200, 200)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-    
-    # Summary
-    if data.get('summary'):
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, data['summary'])
-        pdf.ln(5)
-    
-    # Experience
-    if data.get('experience'):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'Experience', 0, 1)
-        pdf.set_draw_color(200, 200, 200)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(3)
-        
-        for exp in data['experience']:
-            if exp.get('position'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(95, 6, exp.get('position', ''), 0, 0)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 6, exp.get('duration', ''), 0, 1, 'R')
-                pdf.set_font('Arial', 'I', 10)
-                pdf.cell(0, 5, exp.get('company', ''), 0, 1)
-                pdf.set_font('Arial', '', 9)
-                if exp.get('description'):
-                    for line in exp['description'].split('\n'):
-                        if line.strip():
-                            pdf.multi_cell(0, 5, f"- {line.strip()}")
-                pdf.ln(3)
-    
-    # Education
-    if data.get('education'):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'Education', 0, 1)
-        pdf.set_draw_color(200, 200, 200)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(3)
-        
-        for edu in data['education']:
-            if edu.get('degree'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(95, 6, edu.get('degree', ''), 0, 0)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 6, edu.get('year', ''), 0, 1, 'R')
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 5, edu.get('institution', ''), 0, 1)
-                pdf.ln(2)
-    
-    # Projects
-    if data.get('projects'):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'Projects', 0, 1)
-        pdf.set_draw_color(200, 200, 200)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(3)
-        
-        for proj in data['projects']:
-            if proj.get('title'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, proj.get('title', ''), 0, 1)
-                pdf.set_font('Arial', '', 9)
-                if proj.get('description'):
-                    pdf.multi_cell(0, 5, proj['description'])
-                pdf.ln(2)
-    
-    # Skills
-    if data.get('skills'):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 8, 'Skills', 0, 1)
-        pdf.set_draw_color(200, 200, 200)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(3)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, data['skills'])
-    
-    return pdf
+def render_resume(plan, data):
+    pool = get_render_pool()
+    if pool is None:
+        return render_pdf_bytes(plan, data)
+    return pool.render(plan, data)
 
-def create_creative_resume(data):
-    pdf = ResumePDF(TEMPLATES["Creative"]["color"])
-    pdf.add_page()
-    color_rgb = pdf.hex_to_rgb(TEMPLATES["Creative"]["color"])
-    
-    # Header with angled design
-    pdf.set_fill_color(*color_rgb)
-    pdf.rect(0, 0, 210, 50, 'F')
-    
-    # Name
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_font('Arial', 'B', 26)
-    pdf.set_xy(15, 15)
-    pdf.cell(0, 10, data.get('name', ''), 0, 1)
-    
-    # Job Role
-    if data.get('job_role'):
-        pdf.set_font('Arial', '', 12)
-        pdf.set_x(15)
-        pdf.cell(0, 8, data['job_role'], 0, 1)
-    
-    # Contact
-    pdf.set_font('Arial', '', 9)
-    pdf.set_x(15)
-    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
-    pdf.cell(0, 6, contact, 0, 1)
-    
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(8)
-    
-    # Two column layout
-    col_width = 90
-    
-    # Left column - Summary and Skills
-    pdf.set_xy(15, 60)
-    if data.get('summary'):
-        pdf.set_fill_color(240, 240, 240)
-        pdf.rect(15, pdf.get_y(), col_width, 5, 'F')
-        pdf.set_font('Arial', 'B', 11)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(col_width, 5, 'ABOUT ME', 0, 1)
-        pdf.set_x(15)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 9)
-        pdf.multi_cell(col_width, 5, data['summary'])
-        pdf.ln(3)
-    
-    # Skills
-    if data.get('skills'):
-        pdf.set_x(15)
-        pdf.set_fill_color(240, 240, 240)
-        pdf.rect(15, pdf.get_y(), col_width, 5, 'F')
-        pdf.set_font('Arial', 'B', 11)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(col_width, 5, 'SKILLS', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 9)
-        pdf.set_x(15)
-        pdf.multi_cell(col_width, 5, data['skills'])
-    
-    # Right column - Experience and Education
-    pdf.set_xy(110, 60)
-    
-    if data.get('experience'):
-        pdf.set_fill_color(240, 240, 240)
-        pdf.rect(110, pdf.get_y(), col_width, 5, 'F')
-        pdf.set_font('Arial', 'B', 11)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(col_width, 5, 'EXPERIENCE', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for exp in data['experience'][:2]:
-            if exp.get('position'):
-                pdf.set_x(110)
-                pdf.set_font('Arial', 'B', 10)
-                pdf.cell(0, 5, exp.get('position', ''), 0, 1)
-                pdf.set_x(110)
-                pdf.set_font('Arial', 'I', 9)
-                pdf.cell(0, 4, f"{exp.get('company', '')} - {exp.get('duration', '')}", 0, 1)
-                pdf.set_x(110)
-                pdf.set_font('Arial', '', 8)
-                if exp.get('description'):
-                    lines = exp['description'].split('\n')[:3]
-                    for line in lines:
-                        if line.strip():
-                            pdf.set_x(110)
-                            pdf.multi_cell(col_width, 4, f"- {line.strip()}")
-                pdf.ln(2)
-    
-    if data.get('education'):
-        pdf.set_x(110)
-        pdf.set_fill_color(240, 240, 240)
-        pdf.rect(110, pdf.get_y(), col_width, 5, 'F')
-        pdf.set_font('Arial', 'B', 11)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(col_width, 5, 'EDUCATION', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for edu in data['education']:
-            if edu.get('degree'):
-                pdf.set_x(110)
-                pdf.set_font('Arial', 'B', 10)
-                pdf.cell(0, 5, edu.get('degree', ''), 0, 1)
-                pdf.set_x(110)
-                pdf.set_font('Arial', '', 9)
-                pdf.cell(0, 4, edu.get('institution', ''), 0, 1)
-    
-    return pdf
+def render_packet(records_path, plans, default_template, filename):
+    # Streams the packet into the artifact store without holding it in memory
+    store = get_artifact_store()
+    out_path = store.staging_path()
+    try:
+        pool = get_render_pool()
+        if pool is None:
+            summary = write_packet_file(records_path, out_path, plans, default_template)
+        else:
+            summary = pool.render_packet(records_path, out_path, plans, default_template)
+        summary["digest"] = store.put_file(out_path, filename)
+        return summary
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
 
-def create_executive_resume(data):
-    pdf = ResumePDF(TEMPLATES["Executive"]["color"])
-    pdf.add_page()
-    color_rgb = pdf.hex_to_rgb(TEMPLATES["Executive"]["color"])
-    
-    # Elegant header
-    pdf.set_font('Arial', 'B', 24)
-    pdf.set_text_color(*color_rgb)
-    pdf.cell(0, 12, data.get('name', ''), 0, 1, 'C')
-    
-    pdf.set_font('Arial', '', 10)
-    pdf.set_text_color(100, 100, 100)
-    if data.get('job_role'):
-        pdf.cell(0, 6, data['job_role'], 0, 1, 'C')
-    
-    contact = f"{data.get('email', '')} - {data.get('phone', '')} - {data.get('location', '')}"
-    pdf.cell(0, 6, contact, 0, 1, 'C')
-    
-    pdf.set_draw_color(*color_rgb)
-    pdf.set_line_width(0.5)
-    pdf.line(20, pdf.get_y() + 3, 190, pdf.get_y() + 3)
-    pdf.ln(8)
-    
-    pdf.set_text_color(0, 0, 0)
-    
-    # Executive Summary
-    if data.get('summary'):
-        pdf.set_font('Arial', 'B', 13)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'EXECUTIVE SUMMARY', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 6, data['summary'])
-        pdf.ln(4)
-    
-    # Professional Experience
-    if data.get('experience'):
-        pdf.set_font('Arial', 'B', 13)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'PROFESSIONAL EXPERIENCE', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for exp in data['experience']:
-            if exp.get('position'):
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(120, 6, exp.get('position', ''), 0, 0)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 6, exp.get('duration', ''), 0, 1, 'R')
-                pdf.set_font('Arial', 'I', 11)
-                pdf.cell(0, 6, exp.get('company', ''), 0, 1)
-                pdf.set_font('Arial', '', 10)
-                if exp.get('description'):
-                    for line in exp['description'].split('\n'):
-                        if line.strip():
-                            pdf.multi_cell(0, 5, f"- {line.strip()}")
-                pdf.ln(3)
-    
-    # Education & Qualifications
-    if data.get('education'):
-        pdf.set_font('Arial', 'B', 13)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'EDUCATION & QUALIFICATIONS', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        for edu in data['education']:
-            if edu.get('degree'):
-                pdf.set_font('Arial', 'B', 11)
-                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
-                pdf.set_font('Arial', '', 10)
-                pdf.cell(120, 5, edu.get('institution', ''), 0, 0)
-                pdf.cell(0, 5, edu.get('year', ''), 0, 1, 'R')
-                pdf.ln(2)
-    
-    # Core Competencies
-    if data.get('skills'):
-        pdf.set_font('Arial', 'B', 13)
-        pdf.set_text_color(*color_rgb)
-        pdf.cell(0, 8, 'CORE COMPETENCIES', 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 6, data['skills'])
-    
-    return pdf
-
-def generate_resume(template_name, data):
-    if template_name == "Professional":
-        return create_professional_resume(data)
-    elif template_name == "Modern":
-        return create_modern_resume(data)
-    elif template_name == "Minimal":
-        return create_minimal_resume(data)
-    elif template_name == "Creative":
-        return create_creative_resume(data)
-    elif template_name == "Executive":
-        return create_executive_resume(data)
+def build_preview_html(template_color, data):
+    return f"""
+            <div style='border: 3px solid {template_color}; border-radius: 15px; padding: 30px; 
+                        background: white; box-shadow: 0 8px 16px rgba(0,0,0,0.1); margin: 20px 0;'>
+                
+                <!-- Header Section -->
+                <div style='background: linear-gradient(135deg, {template_color} 0%, {template_color}dd 100%); 
+                            padding: 30px; border-radius: 10px; margin-bottom: 25px; text-align: center;'>
+                    <h1 style='color: white; margin: 0; font-size: 36px; font-weight: bold;'>{data.get('name', '')}</h1>
+                    <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; opacity: 0.95;'>{data.get('job_role', '')}</p>
+                    <p style='color: white; margin: 5px 0; font-size: 14px; opacity: 0.9;'>
+                        {data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}
+                    </p>
+                    {f"<p style='color: white; margin: 5px 0; font-size: 13px; opacity: 0.85;'>{data.get('linkedin', '')} | {data.get('portfolio', '')}</p>" if data.get('linkedin') or data.get('portfolio') else ''}
+                </div>
+                
+                <!-- Professional Summary -->
+                {f'''
+                <div style='margin-bottom: 25px;'>
+                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
+                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
+                        💼 PROFESSIONAL SUMMARY
+                    </h3>
+                    <p style='color: #333; line-height: 1.8; font-size: 15px; text-align: justify;'>
+                        {data.get('summary', '')}
+                    </p>
+                </div>
+                ''' if data.get('summary') else ''}
+                
+                <!-- Work Experience -->
+                {f'''
+                <div style='margin-bottom: 25px;'>
+                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
+                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
+                        💼 WORK EXPERIENCE
+                    </h3>
+                    {"".join([f'''
+                    <div style='margin-bottom: 20px; padding: 15px; background: #f8f9fa; border-radius: 8px; 
+                                border-left: 4px solid {template_color};'>
+                        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;'>
+                            <h4 style='color: {template_color}; margin: 0; font-size: 18px;'>{exp.get('position', '')}</h4>
+                            <span style='color: #666; font-size: 14px; font-style: italic;'>{exp.get('duration', '')}</span>
+                        </div>
+                        <p style='color: #555; margin: 5px 0 10px 0; font-size: 15px; font-weight: 500;'>
+                            {exp.get('company', '')}
+                        </p>
+                        <div style='color: #444; line-height: 1.7; font-size: 14px;'>
+                            {"".join([f"<p style='margin: 5px 0;'>• {line.strip()}</p>" for line in exp.get('description', '').split('\\n') if line.strip()])}
+                        </div>
+                    </div>
+                    ''' for exp in data.get('experience', []) if exp.get('position')])}
+                </div>
+                ''' if data.get('experience') and any(exp.get('position') for exp in data.get('experience', [])) else ''}
+                
+                <!-- Education -->
+                {f'''
+                <div style='margin-bottom: 25px;'>
+                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
+                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
+                        🎓 EDUCATION
+                    </h3>
+                    {"".join([f'''
+                    <div style='margin-bottom: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;'>
+                        <div style='display: flex; justify-content: space-between; align-items: center;'>
+                            <div>
+                                <h4 style='color: {template_color}; margin: 0 0 5px 0; font-size: 17px;'>{edu.get('degree', '')}</h4>
+                                <p style='color: #555; margin: 0; font-size: 15px;'>{edu.get('institution', '')}</p>
+                                {f"<p style='color: #666; margin: 5px 0 0 0; font-size: 14px;'>GPA: {edu.get('gpa')}</p>" if edu.get('gpa') else ''}
+                            </div>
+                            <span style='color: #666; font-size: 15px; font-weight: 500;'>{edu.get('year', '')}</span>
+                        </div>
+                    </div>
+                    ''' for edu in data.get('education', []) if edu.get('degree')])}
+                </div>
+                ''' if data.get('education') and any(edu.get('degree') for edu in data.get('education', [])) else ''}
+                
+                <!-- Projects -->
+                {f'''
+                <div style='margin-bottom: 25px;'>
+                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
+                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
+                        🚀 PROJECTS
+                    </h3>
+                    {"".join([f'''
+                    <div style='margin-bottom: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;'>
+                        <h4 style='color: {template_color}; margin: 0 0 8px 0; font-size: 17px;'>{proj.get('title', '')}</h4>
+                        <p style='color: #444; margin: 0 0 8px 0; line-height: 1.6; font-size: 14px;'>{proj.get('description', '')}</p>
+                        {f"<p style='color: #666; margin: 0; font-size: 13px; font-style: italic;'><strong>Technologies:</strong> {proj.get('technologies')}</p>" if proj.get('technologies') else ''}
+                    </div>
+                    ''' for proj in data.get('projects', []) if proj.get('title')])}
+                </div>
+                ''' if data.get('projects') and any(proj.get('title') for proj in data.get('projects', [])) else ''}
+                
+                <!-- Skills -->
+                {f'''
+                <div style='margin-bottom: 25px;'>
+                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
+                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
+                        ⚡ SKILLS
+                    </h3>
+                    <div style='display: flex; flex-wrap: wrap; gap: 10px;'>
+                        {"".join([f"<span style='background: {template_color}; color: white; padding: 8px 16px; border-radius: 20px; font-size: 14px; font-weight: 500;'>{skill.strip()}</span>" for skill in data.get('skills', '').replace('\\n', ',').split(',') if skill.strip()])}
+                    </div>
+                </div>
+                ''' if data.get('skills') else ''}
+                
+            </div>
+            """
+
+@st.cache_resource
+def get_content_generator():
+    # Shared by every session so the response cache and request batching span all users
+    return ContentGenerator(create_backend())
+
+@st.cache_resource
+def get_bullet_index():
+    return load_default_index()
+
+@st.cache_resource
+def get_admission_controller():
+    # One controller per process: every session's renders compete for the same workers
+    pool = get_render_pool()
+    return AdmissionController(max_concurrent=pool.processes if pool is not None else None)
+
+@st.cache_resource
+def get_memory_governor():
+    return MemoryGovernor()
+
+@st.cache_resource
+def get_artifact_store():
+    store = ArtifactStore()
+    port = int(os.environ.get('RESUME_ARTIFACT_PORT', 8502))
+    if not os.environ.get('RESUME_ARTIFACT_BASE_URL'):
+        # No external static server configured: serve downloads from this process
+        try:
+            serve_in_background(store, port=port)
+        except OSError:
+            pass  # Port already bound by another app process sharing this store
+    return store
+
+def artifact_base_url():
+    if os.environ.get('RESUME_ARTIFACT_BASE_URL'):
+        return os.environ['RESUME_ARTIFACT_BASE_URL']
+    # In-process server: same host the browser used to reach the app, on the artifact port
+    host = urlsplit(f"//{st.context.headers.get('Host') or 'localhost'}").hostname or 'localhost'
+    if ':' in host:
+        host = f"[{host}]"
+    return f"http://{host}:{os.environ.get('RESUME_ARTIFACT_PORT', 8502)}"
+
+@st.cache_resource
+def get_history_store():
+    return VersionStore()
+
+@st.cache_resource
+def get_search_index():
+    # Kept up to date on every save; `python search_index.py rebuild` fills it from history
+    return SearchIndex()
+
+def load_form_state(data):
+    # Entry widgets are keyed rather than seeded from user_data, so fill their keys directly
+    for i, edu in enumerate(data.get('education', [])):
+        for field in ('degree', 'institution', 'year', 'gpa'):
+            st.session_state[f"{field}_{i}"] = edu.get(field, '')
+    for i, exp in enumerate(data.get('experience', [])):
+        for field in ('position', 'company', 'duration'):
+            st.session_state[f"{field}_{i}"] = exp.get(field, '')
+        st.session_state[f"exp_desc_{i}"] = exp.get('description', '')
+    for i, proj in enumerate(data.get('projects', [])):
+        st.session_state[f"proj_title_{i}"] = proj.get('title', '')
+        st.session_state[f"proj_tech_{i}"] = proj.get('technologies', '')
+        st.session_state[f"proj_desc_{i}"] = proj.get('description', '')
+
+def current_tenant():
+    # Organizations open the app with ?tenant_key=<their access key> from RESUME_TENANT_KEYS
+    return get_admission_controller().tenant_for_key(st.query_params.get('tenant_key'))
+
+def is_recruiter():
+    # Candidate search reads every saved resume, so it needs ?recruiter_key= matching RESUME_RECRUITER_KEY
+    expected = os.environ.get('RESUME_RECRUITER_KEY', '')
+    given = st.query_params.get('recruiter_key', '')
+    return bool(expected) and hmac.compare_digest(given.encode('utf-8'), expected.encode('utf-8'))
+
+def collect_bullets(experience):
+    return [line.strip() for exp in experience for line in exp.get('description', '').split('\n') if line.strip()]
+
+def stream_draft(placeholder, tokens):
+    text = ""
+    for token in tokens:
+        text += token
+        placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    return text.strip()
+
+# Warm render workers start with the first session, not the first preview
+get_render_pool()
+
+# Per-session memory accounting
+sid = st.session_state.session_id
+get_memory_governor().touch(sid)
+get_memory_governor().account(sid, 'user_data', st.session_state.user_data)
 
 # Main Application
 st.title("📄 Professional Resume Generator")
@@ -603,11 +333,90 @@ with st.sidebar:
     if st.session_state.selected_template:
         if st.button("👀 Preview & Download"):
             st.session_state.page = 'preview'
+    if st.button("📚 Recruiter Packet"):
+        st.session_state.page = 'packet'
+    if is_recruiter() and st.button("🔎 Find Candidates"):
+        st.session_state.page = 'search'
+if st.session_state.page == 'search' and not is_recruiter():
+    st.session_state.page = 'input'
 
 # INPUT PAGE
 if st.session_state.page == 'input':
     st.header("Enter Your Details")
     
+    # AI drafting
+    with st.expander("✨ Draft with AI"):
+        saved = st.session_state.user_data
+        if not saved.get('job_role'):
+            st.info("💡 Save your details with a Job Role first, then let AI draft your summary and experience bullets.")
+        else:
+            generator = get_content_generator()
+            draft_placeholder = st.empty()
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Draft Professional Summary"):
+                    summary_text = stream_draft(draft_placeholder, generator.stream(summary_request(saved)))
+                    st.session_state.user_data['summary'] = summary_text
+                    st.success("✅ Summary drafted - review it in the form below")
+            with col2:
+                positions = [(i, exp) for i, exp in enumerate(saved.get('experience', [])) if exp.get('position')]
+                if positions:
+                    choice = st.selectbox("Experience entry", range(len(positions)),
+                                          format_func=lambda k: f"{positions[k][1]['position']} - {positions[k][1].get('company', '')}")
+                    if st.button("Draft Experience Bullets"):
+                        idx, exp = positions[choice]
+                        bullets_text = stream_draft(draft_placeholder, generator.stream(bullets_request(saved, exp)))
+                        st.session_state[f"exp_desc_{idx}"] = bullets_text
+                        st.success(f"✅ Bullets drafted for Experience {idx+1} - review them in the form below")
+                else:
+                    st.caption("Add an experience entry with a position to draft bullets.")
+    
+    # Bullet suggestions
+    if load_default_index is not None:
+        with st.expander("💡 Bullet Point Suggestions"):
+            typed = st.text_input("Start typing an experience bullet to see similar strong examples",
+                                  key="bullet_query")
+            if typed.strip():
+                for suggestion, score in get_bullet_index().search(typed, k=5):
+                    st.markdown(f"- {suggestion}")
+                existing = collect_bullets(st.session_state.user_data.get('experience', []))
+                for bullet, _, score in find_near_duplicates([typed] + existing):
+                    if bullet == typed.strip():
+                        st.warning(f"⚠️ Very similar to a bullet you already have ({score:.0%} match)")
+                        break
+    
+    # Version history
+    history_store = get_history_store()
+    history_user = user_key(st.session_state.history_secret)
+    versions = history_store.versions(history_user)
+    if len(versions) > 1:
+        with st.expander(f"🕘 Version History ({len(versions)} versions)"):
+            st.caption("Bookmark this page to come back to these versions later.")
+            labels = {v['version']: f"Version {v['version']} - {datetime.fromtimestamp(v['saved_at']).strftime('%b %d, %Y %H:%M')}"
+                      for v in versions}
+            numbers = list(reversed(labels))
+            col1, col2 = st.columns(2)
+            with col1:
+                older = st.selectbox("Compare version", numbers, index=1, format_func=labels.get)
+            with col2:
+                newer = st.selectbox("With version", numbers, index=0, format_func=labels.get)
+            changes = describe_changes(history_store.get(history_user, older), history_store.get(history_user, newer))
+            if not changes:
+                st.info("No differences between these versions")
+            for field, before, after in changes:
+                st.markdown(f"**{field}**")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.code(str(before) if before is not None else "(not set)", language=None)
+                with col2:
+                    st.code(str(after) if after is not None else "(not set)", language=None)
+            if st.button(f"↩️ Restore Version {older}"):
+                st.session_state.user_data = history_store.get(history_user, older)
+                load_form_state(st.session_state.user_data)
+                history_store.save(history_user, st.session_state.user_data)
+                get_search_index().index_resume(history_user, st.session_state.user_data)
+                st.rerun()
+    
     with st.form("resume_form"):
         # Personal Information
         st.subheader("Personal Information")
@@ -623,6 +432,20 @@ if st.session_state.page == 'input':
         
         portfolio = st.text_input("Portfolio/Website", value=st.session_state.user_data.get('portfolio', ''))
         
+        # Profile photo, shown by templates that have a photo slot
+        photo_upload = None
+        remove_photo = False
+        photo_plans = [plan for plan in get_template_registry().plans().values() if 'photo' in plan.layout]
+        if PHOTO_UPLOADS and photo_plans:
+            photo_upload = st.file_uploader(
+                f"Profile Photo (optional, shown by the {' and '.join(plan.name for plan in photo_plans)} templates)",
+                type=['jpg', 'jpeg', 'png', 'webp']
+            )
+            current_photo = st.session_state.user_data.get('photo')
+            if current_photo and PHOTOS.exists(current_photo):
+                st.image(PHOTOS.slot_path(current_photo, 30, 30), width=100)
+                remove_photo = st.checkbox("Remove current photo")
+        
         # Professional Summary
         st.subheader("Professional Summary")
         summary = st.text_area("Write a brief summary about yourself", 
@@ -631,7 +454,7 @@ if st.session_state.page == 'input':
         
         # Education
         st.subheader("Education")
-        num_education = st.number_input("Number of Education Entries", min_value=1, max_value=5, value=1)
+        num_education = st.number_input("Number of Education Entries", min_value=1, max_value=5, value=max(1, min(5, len(st.session_state.user_data.get('education', [])))))
         education = []
         for i in range(int(num_education)):
             st.markdown(f"**Education {i+1}**")
@@ -646,7 +469,7 @@ if st.session_state.page == 'input':
         
         # Work Experience
         st.subheader("Work Experience")
-        num_experience = st.number_input("Number of Experience Entries", min_value=1, max_value=5, value=1)
+        num_experience = st.number_input("Number of Experience Entries", min_value=1, max_value=5, value=max(1, min(5, len(st.session_state.user_data.get('experience', [])))))
         experience = []
         for i in range(int(num_experience)):
             st.markdown(f"**Experience {i+1}**")
@@ -661,7 +484,7 @@ if st.session_state.page == 'input':
         
         # Projects
         st.subheader("Projects (Optional)")
-        num_projects = st.number_input("Number of Projects", min_value=0, max_value=5, value=0)
+        num_projects = st.number_input("Number of Projects", min_value=0, max_value=5, value=min(5, len(st.session_state.user_data.get('projects', []))))
         projects = []
         for i in range(int(num_projects)):
             st.markdown(f"**Project {i+1}**")
@@ -687,22 +510,45 @@ if st.session_state.page == 'input':
             if not name or not email or not phone:
                 st.error("❌ Please fill in all required fields (Name, Email, Phone)")
             else:
-                st.session_state.user_data = {
-                    "name": name,
-                    "email": email,
-                    "phone": phone,
-                    "job_role": job_role,
-                    "location": location,
-                    "linkedin": linkedin,
-                    "portfolio": portfolio,
-                    "summary": summary,
-                    "education": education,
-                    "experience": experience,
-                    "projects": projects,
-                    "skills": skills
-                }
-                st.success("✅ Details saved successfully!")
-                st.info("👈 Click 'Choose Template' in the sidebar to select your resume design")
+                photo = None if remove_photo else st.session_state.user_data.get('photo')
+                photo_error = None
+                if photo_upload is not None:
+                    try:
+                        photo = PHOTOS.add(photo_upload.getvalue())
+                        # Cut each template's slot variant now so renders only read small files
+                        for plan in photo_plans:
+                            PHOTOS.slot_path(photo, plan.layout['photo']['w'], plan.layout['photo']['h'])
+                    except ValueError as e:
+                        photo_error = str(e)
+                if photo_error:
+                    # A rejected upload stops the save rather than silently keeping the old photo
+                    st.error(f"❌ {photo_error} Your details were not saved - choose another photo "
+                             "or remove it, then save again.")
+                else:
+                    st.session_state.user_data = {
+                        "name": name,
+                        "email": email,
+                        "phone": phone,
+                        "job_role": job_role,
+                        "location": location,
+                        "linkedin": linkedin,
+                        "portfolio": portfolio,
+                        "summary": summary,
+                        "education": education,
+                        "experience": experience,
+                        "projects": projects,
+                        "skills": skills
+                    }
+                    if photo:
+                        st.session_state.user_data["photo"] = photo
+                    history_user = user_key(st.session_state.history_secret)
+                    version = get_history_store().save(history_user, st.session_state.user_data)
+                    get_search_index().index_resume(history_user, st.session_state.user_data)
+                    st.success(f"✅ Details saved successfully! (version {version})")
+                    if load_default_index is not None:
+                        for first, second, score in find_near_duplicates(collect_bullets(experience)):
+                            st.warning(f"⚠️ Near-duplicate bullets ({score:.0%} match): \"{first}\" and \"{second}\"")
+                    st.info("👈 Click 'Choose Template' in the sidebar to select your resume design")
 
 # TEMPLATE SELECTION PAGE
 elif st.session_state.page == 'template':
@@ -717,19 +563,20 @@ elif st.session_state.page == 'template':
         
         # Display templates in grid
         cols = st.columns(3)
-        template_keys = list(TEMPLATES.keys())
+        templates = get_template_registry().plans()
+        template_keys = list(templates.keys())
         
-        for idx, (template_name, template_info) in enumerate(TEMPLATES.items()):
+        for idx, (template_name, template_info) in enumerate(templates.items()):
             with cols[idx % 3]:
                 st.markdown(f"""
-                <div style='border: 3px solid {template_info['color']}; 
+                <div style='border: 3px solid {template_info.color}; 
                             border-radius: 10px; 
                             padding: 20px; 
                             text-align: center;
-                            background: linear-gradient(135deg, {template_info['color']}15 0%, {template_info['color']}05 100%);
+                            background: linear-gradient(135deg, {template_info.color}15 0%, {template_info.color}05 100%);
                             margin-bottom: 20px;'>
-                    <h3 style='color: {template_info['color']};'>{template_info['name']}</h3>
-                    <p style='font-size: 14px; color: #666;'>{template_info['description']}</p>
+                    <h3 style='color: {template_info.color};'>{template_info.name}</h3>
+                    <p style='font-size: 14px; color: #666;'>{template_info.description}</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -756,22 +603,32 @@ elif st.session_state.page == 'preview':
         
         # Generate PDF
         try:
-            pdf = generate_resume(st.session_state.selected_template, st.session_state.user_data)
-            # Generate PDF as bytes
-            pdf_bytes = pdf.output(dest='S')
-            if isinstance(pdf_bytes, str):
-                pdf_output = pdf_bytes.encode('latin-1', errors='ignore')
-            else:
-                pdf_output = pdf_bytes
+            # The plan is resolved once, so this render finishes on the version it started with
+            plan = get_template_registry().get(st.session_state.selected_template)
+            # Reuse this session's last render while the inputs and template version are unchanged
+            digest = resume_digest(plan, st.session_state.user_data)
+            rendered_current = st.session_state.rendered_digest == digest
+            store = get_artifact_store()
+            if not (rendered_current and st.session_state.artifact_digest
+                    and store.exists(st.session_state.artifact_digest)):
+                def render():
+                    # Only actual renders draw on the admission quota, not cache hits
+                    with get_admission_controller().admit(current_tenant(), 'interactive'):
+                        return render_resume(plan, st.session_state.user_data)
+                pdf_output = get_render_cache().get_or_render(digest, render)
+                # Written once to the artifact store; the session only keeps the digest
+                st.session_state.artifact_digest = store.put(
+                    pdf_output,
+                    f"{st.session_state.user_data.get('name', 'resume').replace(' ', '_')}_resume.pdf"
+                )
+                st.session_state.rendered_digest = digest
             
             # Create download button
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
-                st.download_button(
-                    label="📥 Download Resume (PDF)",
-                    data=pdf_output,
-                    file_name=f"{st.session_state.user_data.get('name', 'resume').replace(' ', '_')}_resume.pdf",
-                    mime="application/pdf",
+                st.link_button(
+                    "📥 Download Resume (PDF)",
+                    store.link(st.session_state.artifact_digest, artifact_base_url()),
                     use_container_width=True
                 )
             
@@ -781,117 +638,15 @@ elif st.session_state.page == 'preview':
             st.subheader("📄 Resume Preview")
             
             # Get template color
-            template_color = TEMPLATES[st.session_state.selected_template]["color"]
+            template_color = plan.color
             data = st.session_state.user_data
             
             # Create visual preview card
-            st.markdown(f"""
-            <div style='border: 3px solid {template_color}; border-radius: 15px; padding: 30px; 
-                        background: white; box-shadow: 0 8px 16px rgba(0,0,0,0.1); margin: 20px 0;'>
-                
-                <!-- Header Section -->
-                <div style='background: linear-gradient(135deg, {template_color} 0%, {template_color}dd 100%); 
-                            padding: 30px; border-radius: 10px; margin-bottom: 25px; text-align: center;'>
-                    <h1 style='color: white; margin: 0; font-size: 36px; font-weight: bold;'>{data.get('name', '')}</h1>
-                    <p style='color: white; margin: 10px 0 5px 0; font-size: 18px; opacity: 0.95;'>{data.get('job_role', '')}</p>
-                    <p style='color: white; margin: 5px 0; font-size: 14px; opacity: 0.9;'>
-                        {data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}
-                    </p>
-                    {f"<p style='color: white; margin: 5px 0; font-size: 13px; opacity: 0.85;'>{data.get('linkedin', '')} | {data.get('portfolio', '')}</p>" if data.get('linkedin') or data.get('portfolio') else ''}
-                </div>
-                
-                <!-- Professional Summary -->
-                {f'''
-                <div style='margin-bottom: 25px;'>
-                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
-                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
-                        💼 PROFESSIONAL SUMMARY
-                    </h3>
-                    <p style='color: #333; line-height: 1.8; font-size: 15px; text-align: justify;'>
-                        {data.get('summary', '')}
-                    </p>
-                </div>
-                ''' if data.get('summary') else ''}
-                
-                <!-- Work Experience -->
-                {f'''
-                <div style='margin-bottom: 25px;'>
-                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
-                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
-                        💼 WORK EXPERIENCE
-                    </h3>
-                    {"".join([f'''
-                    <div style='margin-bottom: 20px; padding: 15px; background: #f8f9fa; border-radius: 8px; 
-                                border-left: 4px solid {template_color};'>
-                        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;'>
-                            <h4 style='color: {template_color}; margin: 0; font-size: 18px;'>{exp.get('position', '')}</h4>
-                            <span style='color: #666; font-size: 14px; font-style: italic;'>{exp.get('duration', '')}</span>
-                        </div>
-                        <p style='color: #555; margin: 5px 0 10px 0; font-size: 15px; font-weight: 500;'>
-                            {exp.get('company', '')}
-                        </p>
-                        <div style='color: #444; line-height: 1.7; font-size: 14px;'>
-                            {"".join([f"<p style='margin: 5px 0;'>• {line.strip()}</p>" for line in exp.get('description', '').split('\\n') if line.strip()])}
-                        </div>
-                    </div>
-                    ''' for exp in data.get('experience', []) if exp.get('position')])}
-                </div>
-                ''' if data.get('experience') and any(exp.get('position') for exp in data.get('experience', [])) else ''}
-                
-                <!-- Education -->
-                {f'''
-                <div style='margin-bottom: 25px;'>
-                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
-                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
-                        🎓 EDUCATION
-                    </h3>
-                    {"".join([f'''
-                    <div style='margin-bottom: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;'>
-                        <div style='display: flex; justify-content: space-between; align-items: center;'>
-                            <div>
-                                <h4 style='color: {template_color}; margin: 0 0 5px 0; font-size: 17px;'>{edu.get('degree', '')}</h4>
-                                <p style='color: #555; margin: 0; font-size: 15px;'>{edu.get('institution', '')}</p>
-                                {f"<p style='color: #666; margin: 5px 0 0 0; font-size: 14px;'>GPA: {edu.get('gpa')}</p>" if edu.get('gpa') else ''}
-                            </div>
-                            <span style='color: #666; font-size: 15px; font-weight: 500;'>{edu.get('year', '')}</span>
-                        </div>
-                    </div>
-                    ''' for edu in data.get('education', []) if edu.get('degree')])}
-                </div>
-                ''' if data.get('education') and any(edu.get('degree') for edu in data.get('education', [])) else ''}
-                
-                <!-- Projects -->
-                {f'''
-                <div style='margin-bottom: 25px;'>
-                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
-                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
-                        🚀 PROJECTS
-                    </h3>
-                    {"".join([f'''
-                    <div style='margin-bottom: 15px; padding: 15px; background: #f8f9fa; border-radius: 8px;'>
-                        <h4 style='color: {template_color}; margin: 0 0 8px 0; font-size: 17px;'>{proj.get('title', '')}</h4>
-                        <p style='color: #444; margin: 0 0 8px 0; line-height: 1.6; font-size: 14px;'>{proj.get('description', '')}</p>
-                        {f"<p style='color: #666; margin: 0; font-size: 13px; font-style: italic;'><strong>Technologies:</strong> {proj.get('technologies')}</p>" if proj.get('technologies') else ''}
-                    </div>
-                    ''' for proj in data.get('projects', []) if proj.get('title')])}
-                </div>
-                ''' if data.get('projects') and any(proj.get('title') for proj in data.get('projects', [])) else ''}
-                
-                <!-- Skills -->
-                {f'''
-                <div style='margin-bottom: 25px;'>
-                    <h3 style='color: {template_color}; border-bottom: 3px solid {template_color}; 
-                               padding-bottom: 8px; margin-bottom: 15px; font-size: 20px;'>
-                        ⚡ SKILLS
-                    </h3>
-                    <div style='display: flex; flex-wrap: wrap; gap: 10px;'>
-                        {"".join([f"<span style='background: {template_color}; color: white; padding: 8px 16px; border-radius: 20px; font-size: 14px; font-weight: 500;'>{skill.strip()}</span>" for skill in data.get('skills', '').replace('\\n', ',').split(',') if skill.strip()])}
-                    </div>
-                </div>
-                ''' if data.get('skills') else ''}
-                
-            </div>
-            """, unsafe_allow_html=True)
+            preview_html = get_memory_governor().get(sid, 'preview_html') if rendered_current else None
+            if preview_html is None:
+                preview_html = build_preview_html(template_color, data)
+                get_memory_governor().put(sid, 'preview_html', preview_html)
+            st.markdown(preview_html, unsafe_allow_html=True)
             
             st.markdown("---")
             
@@ -922,7 +677,13 @@ elif st.session_state.page == 'preview':
             with col3:
                 if st.button("🔄 Start New Resume", use_container_width=True):
                     st.session_state.user_data = {}
+                    # A new resume starts a new version history
+                    st.session_state.history_secret = new_history_secret()
+                    st.query_params['resume'] = st.session_state.history_secret
                     st.session_state.selected_template = None
+                    st.session_state.rendered_digest = None
+                    st.session_state.artifact_digest = None
+                    get_memory_governor().drop_session(sid)
                     st.session_state.page = 'input'
                     st.rerun()
             
@@ -957,6 +718,12 @@ elif st.session_state.page == 'preview':
                 - Lies or exaggerations
                 """)
                 
+        except Overloaded as e:
+            st.warning(f"⏳ We're generating a lot of resumes right now. {e.reason} "
+                       f"Please try again in about {max(1, round(e.retry_after))} seconds.")
+            if st.button("🔄 Try Again"):
+                st.rerun()
+        
         except Exception as e:
             st.error(f"❌ Error generating resume: {str(e)}")
             st.info("💡 Please try a different template or check your input data.")
@@ -968,6 +735,139 @@ elif st.session_state.page == 'preview':
                 st.write("- Check if all text fields contain valid characters")
                 st.write("- Ensure no special Unicode characters in your text")
 
+# RECRUITER PACKET PAGE
+elif st.session_state.page == 'packet':
+    st.header("📚 Recruiter Packet")
+    st.markdown("Combine many candidates into a single PDF with a bookmark for each candidate.")
+    
+    records_file = st.file_uploader(
+        "Candidate records",
+        type=['jsonl', 'json'],
+        help="One resume per line (JSON Lines) or a JSON array. Each record is the resume data itself, "
+             "or {\"template\": \"Modern\", \"data\": {...}} to pick a template per candidate."
+    )
+    plans = get_template_registry().plans()
+    default_template = st.selectbox("Template for records that don't name one", list(plans))
+    
+    if st.button("📦 Build Packet", disabled=records_file is None):
+        store = get_artifact_store()
+        records_path = store.staging_path()
+        try:
+            with open(records_path, 'wb') as f:
+                f.write(records_file.getbuffer())
+            # Quota is charged per candidate, so one large packet costs what its renders do
+            candidates = sum(1 for _ in read_records(records_path))
+            with st.spinner("Rendering packet..."):
+                with get_admission_controller().admit(current_tenant(), 'batch', cost=max(1, candidates)):
+                    st.session_state.packet = render_packet(
+                        records_path, plans, default_template,
+                        f"candidate_packet_{datetime.now().strftime('%Y%m%d')}.pdf"
+                    )
+        except Overloaded as e:
+            st.warning(f"⏳ We're generating a lot of resumes right now. {e.reason} "
+                       f"Please try again in about {max(1, round(e.retry_after))} seconds.")
+        except ValueError as e:
+            st.error(f"❌ Could not build the packet: {str(e)}")
+        except multiprocessing.TimeoutError:
+            st.error("❌ The packet took too long to render. Try again with fewer candidates.")
+        finally:
+            os.remove(records_path)
+    
+    packet = st.session_state.packet
+    if packet and get_artifact_store().exists(packet["digest"]):
+        st.success(f"✅ Packet ready: {packet['candidates']} candidates, {packet['pages']} pages "
+                   f"({packet['bytes'] / 1024:.0f} KB)")
+        st.link_button("📥 Download Packet (PDF)",
+                       get_artifact_store().link(packet["digest"], artifact_base_url()),
+                       use_container_width=True)
+
+# CANDIDATE SEARCH PAGE
+elif st.session_state.page == 'search':
+    st.header("🔎 Find Candidates")
+    index = get_search_index()
+    
+    query = st.text_input(
+        "Search",
+        placeholder='python AND (aws OR gcp) -intern',
+        help="Words must all match; use OR, NOT or -word, and parentheses to group. "
+             "kube* matches by prefix, \"machine learning\" needs both words, and "
+             "skills:, role:, company:, title:, school:, degree:, tech: or name: limit a word to one field."
+    )
+    try:
+        result = index.search(query, limit=0)
+    except QueryError:
+        result = index.search("", limit=0)
+    
+    filters = {}
+    col1, col2, col3 = st.columns(3)
+    for i, (field, label) in enumerate([("skills", "Skills"), ("job_role", "Role"), ("company", "Company"),
+                                        ("position", "Position"), ("institution", "Institution"),
+                                        ("technologies", "Technologies")]):
+        with (col1, col2, col3)[i % 3]:
+            options = {value: f"{name} ({'~' if result['facets_estimated'] else ''}{count})"
+                       for name, value, count in result["facets"][field]}
+            for value in st.session_state.get(f"facet_{field}", []):
+                options.setdefault(value, value)  # Still selected, though no longer among the top values
+            filters[field] = st.multiselect(label, list(options), format_func=options.get, key=f"facet_{field}")
+    
+    try:
+        result = index.search(query, filters)
+    except QueryError as e:
+        st.error(f"❌ {str(e)}")
+        result = None
+    
+    if result is not None:
+        st.caption(f"{result['total']} candidates ({result['seconds'] * 1000:.0f} ms)")
+        for hit in result["results"]:
+            st.markdown(f"**{hit['name'] or 'Unnamed'}** - {hit['job_role'] or 'No role'} "
+                        f"<span style='color: #999;'>(updated {datetime.fromtimestamp(hit['updated']).strftime('%b %d, %Y')})</span>",
+                        unsafe_allow_html=True)
+        
+        plans = get_template_registry().plans()
+        default_template = st.selectbox("Packet template", list(plans))
+        if st.button(f"📦 Build Packet from {len(result['results'])} Results", disabled=not result["results"]):
+            store = get_artifact_store()
+            records_path = store.staging_path()
+            try:
+                with open(records_path, 'w', encoding='utf-8') as f:
+                    for data in index.documents(hit["doc_id"] for hit in result["results"]):
+                        f.write(json.dumps(data) + "\n")
+                with st.spinner("Rendering packet..."):
+                    with get_admission_controller().admit(current_tenant(), 'batch', cost=len(result["results"])):
+                        st.session_state.search_packet = render_packet(
+                            records_path, plans, default_template,
+                            f"candidate_packet_{datetime.now().strftime('%Y%m%d')}.pdf"
+                        )
+            except Overloaded as e:
+                st.warning(f"⏳ We're generating a lot of resumes right now. {e.reason} "
+                           f"Please try again in about {max(1, round(e.retry_after))} seconds.")
+            except ValueError as e:
+                st.error(f"❌ Could not build the packet: {str(e)}")
+            except multiprocessing.TimeoutError:
+                st.error("❌ The packet took too long to render. Try again with fewer candidates.")
+            finally:
+                os.remove(records_path)
+        
+        packet = st.session_state.search_packet
+        if packet and get_artifact_store().exists(packet["digest"]):
+            st.success(f"✅ Packet ready: {packet['candidates']} candidates, {packet['pages']} pages "
+                       f"({packet['bytes'] / 1024:.0f} KB)")
+            st.link_button("📥 Download Packet (PDF)",
+                           get_artifact_store().link(packet["digest"], artifact_base_url()),
+                           use_container_width=True)
+
+# Service metrics (operators only)
+if os.environ.get('RESUME_SHOW_METRICS'):
+    with st.sidebar.expander("📊 Service Metrics"):
+        st.json({"admission": get_admission_controller().metrics(),
+                 "memory": get_memory_governor().metrics(),
+                 "render_pool": get_render_pool().metrics() if get_render_pool() else None,
+                 "render_cache": get_render_cache().metrics(),
+                 "search": get_search_index().stats(),
+                 "templates": {"generation": get_template_registry().generation,
+                               "versions": {name: plan.version for name, plan in get_template_registry().plans().items()},
+                               "errors": get_template_registry().errors}})
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,263 @@
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+DEFAULT_ROOT = os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'artifacts')
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ArtifactStore:
+    # Rendered files stored once on disk under the SHA-256 of their bytes. Downloads are
+    # handed out as short-lived signed links served by `ArtifactRequestHandler`.
+    def __init__(self, root=None, ttl=None, link_ttl=None, secret=None):
+        self.root = root or os.environ.get('RESUME_ARTIFACT_DIR', DEFAULT_ROOT)
+        self.ttl = ttl or float(os.environ.get('RESUME_ARTIFACT_TTL', 24 * 3600))
+        self.link_ttl = link_ttl or float(os.environ.get('RESUME_ARTIFACT_LINK_TTL', 15 * 60))
+        os.makedirs(self.root, exist_ok=True)
+        self._puts = 0
+        self.secret = secret or os.environ.get('RESUME_ARTIFACT_SECRET', '').encode('utf-8') or self._load_secret()
+
+    def _load_secret(self):
+        # Shared with a standalone `python artifacts.py serve` process using the same root
+        path = os.path.join(self.root, '.secret')
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            secret = secrets.token_hex(32).encode('utf-8')
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                with open(path, 'rb') as f:
+                    return f.read()
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secret)
+            return secret
+
+    def _path(self, digest, suffix):
+        return os.path.join(self.root, digest[:2], f"{digest}{suffix}")
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_meta(self, digest, filename, content_type, size):
+        # Metadata is rewritten on every put so re-rendered artifacts stay alive
+        meta = {"filename": filename, "content_type": content_type, "size": size,
+                "expires_at": time.time() + self.ttl}
+        self._write_atomic(self._path(digest, '.json'), json.dumps(meta).encode('utf-8'))
+        self._puts += 1
+        if self._puts % 256 == 0:
+            self.purge_expired()
+
+    def put(self, data, filename, content_type='application/pdf'):
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._path(digest, '.bin')):
+            self._write_atomic(self._path(digest, '.bin'), data)
+        self._write_meta(digest, filename, content_type, len(data))
+        return digest
+
+    def staging_path(self):
+        # Temp file on the store's filesystem, so put_file() can move it into place
+        fd, path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        os.close(fd)
+        return path
+
+    def put_file(self, path, filename, content_type='application/pdf'):
+        # Like put() for large files: hashed in chunks and moved, never read into memory
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        size = os.path.getsize(path)
+        target = self._path(digest, '.bin')
+        if os.path.exists(target):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        self._write_meta(digest, filename, content_type, size)
+        return digest
+
+    def meta(self, digest):
+        if not _DIGEST_RE.match(digest):
+            return None
+        try:
+            with open(self._path(digest, '.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta["expires_at"] < time.time() or not os.path.exists(self._path(digest, '.bin')):
+            return None
+        return meta
+
+    def exists(self, digest):
+        return self.meta(digest) is not None
+
+    def open(self, digest):
+        return open(self._path(digest, '.bin'), 'rb')
+
+    def _signature(self, digest, expires):
+        return hmac.new(self.secret, f"{digest}:{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def link(self, digest, base_url, ttl=None):
+        expires = int(time.time() + (ttl or self.link_ttl))
+        return f"{base_url.rstrip('/')}/a/{digest}?exp={expires}&sig={self._signature(digest, expires)}"
+
+    def verify(self, digest, expires, signature):
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        return hmac.compare_digest(self._signature(digest, expires), signature or '')
+
+    def purge_expired(self):
+        removed = 0
+        now = time.time()
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    with open(path) as f:
+                        expired = json.load(f)["expires_at"] < now
+                except (OSError, ValueError, KeyError):
+                    expired = True
+                if expired:
+                    for stale in (path, path[:-len('.json')] + '.bin'):
+                        try:
+                            os.remove(stale)
+                        except OSError:
+                            pass
+                    removed += 1
+        return removed
+
+
+class ArtifactRequestHandler(BaseHTTPRequestHandler):
+    store = None
+    server_version = "ResumeArtifacts/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _error(self, status, message):
+        body = message.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _serve(self, send_body):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'a' or not _DIGEST_RE.match(parts[1]):
+            return self._error(404, "Not found")
+        digest = parts[1]
+        query = parse_qs(url.query)
+        expires, signature = query.get('exp', [''])[0], query.get('sig', [''])[0]
+        if not self.store.verify(digest, expires, signature):
+            return self._error(403, "Invalid download link")
+        if int(expires) < time.time():
+            return self._error(410, "This download link has expired. Reopen the preview page for a new one.")
+        meta = self.store.meta(digest)
+        if meta is None:
+            return self._error(404, "This file is no longer available")
+
+        etag = f'"{digest}"'
+        size = meta["size"]
+        common = [
+            ("ETag", etag),
+            ("Accept-Ranges", "bytes"),
+            ("Cache-Control", f"private, max-age={max(0, int(expires) - int(time.time()))}"),
+        ]
+        if_none_match = self.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            self.send_response(304)
+            for name, value in common:
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        start, end, status = 0, size - 1, 200
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (not if_range or if_range.strip() == etag):
+            match = _RANGE_RE.match(range_header.strip())
+            # Malformed ranges are ignored and the whole file is sent
+            if match and (match.group(1) or match.group(2)):
+                first, last = match.group(1), match.group(2)
+                if first:
+                    start, end = int(first), min(int(last), size - 1) if last else size - 1
+                else:
+                    start, end = max(0, size - int(last)), size - 1
+                if start > end or start >= size:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status = 206
+
+        self.send_response(status)
+        for name, value in common:
+            self.send_header(name, value)
+        self.send_header("Content-Type", meta["content_type"])
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(meta['filename'])}")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not send_body:
+            return
+        with self.store.open(digest) as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(64 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def make_server(store, host='0.0.0.0', port=8502):
+    handler = type('BoundArtifactRequestHandler', (ArtifactRequestHandler,), {"store": store})
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve_in_background(store, host='0.0.0.0', port=8502):
+    server = make_server(store, host, port)
+    threading.Thread(target=server.serve_forever, name="artifact-server", daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    # python artifacts.py serve [port]
+    if len(sys.argv) < 2 or sys.argv[1] != 'serve':
+        print("Usage: python artifacts.py serve [port]")
+        sys.exit(1)
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.environ.get('RESUME_ARTIFACT_PORT', 8502))
+    print(f"Serving artifacts from {ArtifactStore().root} on port {port}")
+    make_server(ArtifactStore(), port=port).serve_forever()
@@ -0,0 +1,442 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class GenerationRequest:
+    def __init__(self, kind, prompt, context=None):
+        self.kind = kind
+        self.prompt = prompt
+        self.context = context or {}
+
+    def cache_key(self, backend):
+        payload = json.dumps([backend.name, backend.model, self.kind, self.prompt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Prompt builders
+def _skills_list(data):
+    return [s.strip() for s in data.get('skills', '').replace('\n', ',').split(',') if s.strip()]
+
+def summary_request(data):
+    context = {
+        "job_role": data.get('job_role', ''),
+        "skills": _skills_list(data)[:8],
+        "positions": [exp.get('position', '') for exp in data.get('experience', []) if exp.get('position')],
+        "companies": [exp.get('company', '') for exp in data.get('experience', []) if exp.get('company')],
+        "degrees": [edu.get('degree', '') for edu in data.get('education', []) if edu.get('degree')],
+    }
+    prompt = (
+        "Write a 3-sentence professional resume summary for a candidate targeting the role "
+        f"'{context['job_role']}'. Previous positions: {', '.join(context['positions']) or 'none'}. "
+        f"Companies: {', '.join(context['companies']) or 'none'}. "
+        f"Education: {', '.join(context['degrees']) or 'none'}. "
+        f"Key skills: {', '.join(context['skills']) or 'none'}. "
+        "Do not use personal pronouns. Return plain text only."
+    )
+    return GenerationRequest('summary', prompt, context)
+
+def bullets_request(data, experience):
+    context = {
+        "job_role": data.get('job_role', ''),
+        "position": experience.get('position', ''),
+        "company": experience.get('company', ''),
+        "duration": experience.get('duration', ''),
+        "notes": [line.strip() for line in experience.get('description', '').split('\n') if line.strip()],
+        "skills": _skills_list(data)[:6],
+    }
+    prompt = (
+        f"Write 4 resume bullet points for the position '{context['position']}' at "
+        f"'{context['company']}' ({context['duration'] or 'dates not given'}) for a candidate targeting "
+        f"'{context['job_role']}'. Existing notes: {' / '.join(context['notes']) or 'none'}. "
+        f"Relevant skills: {', '.join(context['skills']) or 'none'}. "
+        "Start each bullet with a strong action verb, quantify results where possible, "
+        "put one bullet per line with no bullet characters."
+    )
+    return GenerationRequest('bullets', prompt, context)
+
+
+# Backends
+class GenerationBackend:
+    name = 'base'
+    model = ''
+    max_batch_size = 8
+
+    def generate(self, request):
+        raise NotImplementedError
+
+    def generate_batch(self, requests):
+        return [self.generate(request) for request in requests]
+
+    def stream(self, request):
+        yield self.generate(request)
+
+
+class LocalStubBackend(GenerationBackend):
+    # Deterministic offline backend: same request in, same text out
+    name = 'stub'
+    model = 'stub-v1'
+    max_batch_size = 32
+
+    VERBS = ["Led", "Delivered", "Designed", "Streamlined", "Built", "Improved", "Coordinated", "Automated"]
+    OUTCOMES = [
+        "reducing turnaround time by {n}%",
+        "improving customer satisfaction scores by {n}%",
+        "cutting operating costs by {n}%",
+        "increasing team throughput by {n}%",
+        "supporting {n}+ stakeholders across departments",
+    ]
+
+    def __init__(self, token_delay=0.0):
+        self.token_delay = token_delay
+
+    def _rng(self, request):
+        digest = hashlib.sha256(request.prompt.encode('utf-8')).digest()
+        return list(digest)
+
+    def generate(self, request):
+        seed = self._rng(request)
+        ctx = request.context
+        if request.kind == 'summary':
+            role = ctx.get('job_role') or "Professional"
+            skills = ", ".join(ctx.get('skills', [])[:4]) or "problem solving and communication"
+            sentences = [f"Results-driven {role} with a track record of delivering high-quality work."]
+            if ctx.get('positions'):
+                where = f" at {ctx['companies'][0]}" if ctx.get('companies') else ""
+                sentences.append(f"Experienced as {ctx['positions'][0]}{where}, consistently exceeding expectations.")
+            elif ctx.get('degrees'):
+                sentences.append(f"Holds a {ctx['degrees'][0]} and applies it to real-world challenges.")
+            sentences.append(f"Skilled in {skills}, with a focus on measurable impact.")
+            return " ".join(sentences)
+        if request.kind == 'bullets':
+            # Existing notes are polished first, then skills fill the remaining bullets
+            notes = [note.rstrip('.').strip() for note in ctx.get('notes', [])]
+            notes = [note for note in notes if note]
+            subjects = [f"{skill} initiatives" for skill in ctx.get('skills', [])]
+            if not subjects:
+                subjects = [f"core {ctx.get('position') or 'team'} responsibilities"]
+            bullets = []
+            for i in range(4):
+                outcome = self.OUTCOMES[seed[i + 4] % len(self.OUTCOMES)].format(n=10 + seed[i + 8] % 40)
+                if i < len(notes):
+                    bullets.append(f"{notes[i][0].upper()}{notes[i][1:]}, {outcome}")
+                else:
+                    verb = self.VERBS[(seed[i] + i) % len(self.VERBS)]
+                    bullets.append(f"{verb} {subjects[i % len(subjects)]}, {outcome}")
+            return "\n".join(bullets)
+        return request.prompt
+
+    def stream(self, request):
+        text = self.generate(request)
+        for token in _tokenize(text):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+
+class OpenAICompatibleBackend(GenerationBackend):
+    # Any server exposing the /chat/completions API (hosted or local)
+    name = 'openai'
+
+    def __init__(self, base_url=None, api_key=None, model=None, timeout=60):
+        self.base_url = (base_url or os.environ.get('RESUME_GENAI_BASE_URL', 'https://api.openai.com/v1')).rstrip('/')
+        self.api_key = api_key or os.environ.get('RESUME_GENAI_API_KEY', '')
+        self.model = model or os.environ.get('RESUME_GENAI_MODEL', 'gpt-4o-mini')
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.max_batch_size)
+
+    def _post(self, request, stream):
+        body = json.dumps({
+            "model": self.model,
+            "messages": [{"role": "user", "content": request.prompt}],
+            "temperature": 0.3,
+            "stream": stream,
+        }).encode('utf-8')
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        http_request = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, headers=headers)
+        return urllib.request.urlopen(http_request, timeout=self.timeout)
+
+    def generate(self, request):
+        with self._post(request, stream=False) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+        return payload["choices"][0]["message"]["content"].strip()
+
+    def generate_batch(self, requests):
+        # The chat API has no batch endpoint, so fan the batch out in parallel
+        return list(self._pool.map(self.generate, requests))
+
+    def stream(self, request):
+        with self._post(request, stream=True) as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                choices = json.loads(data).get("choices")
+                if not choices:
+                    continue  # Usage-only chunks carry no choices
+                delta = choices[0].get("delta") or {}
+                if delta.get("content"):
+                    yield delta["content"]
+
+
+BACKENDS = {
+    "stub": LocalStubBackend,
+    "openai": OpenAICompatibleBackend,
+}
+
+def create_backend(name=None, **kwargs):
+    name = name or os.environ.get('RESUME_GENAI_BACKEND', 'stub')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown generation backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+def _tokenize(text):
+    # Split into word tokens that keep their trailing whitespace
+    token = ''
+    for char in text:
+        token += char
+        if char.isspace():
+            yield token
+            token = ''
+    if token:
+        yield token
+
+
+# Response cache
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+
+# Request batching
+class RequestBatcher:
+    # Collects requests from concurrent sessions for up to `max_wait` seconds and sends
+    # them to the backend as one batch, collapsing identical prompts into a single call.
+    def __init__(self, backend, max_batch_size=None, max_wait=0.02):
+        self.backend = backend
+        self.max_batch_size = max_batch_size or backend.max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.requests = 0
+        self.streams = 0
+        self._streams = {}
+        self._calls = {}  # key -> futures waiting on a batch already sent to the backend
+        # The collector thread only groups requests; batches and streams run here, so a
+        # slow batch never holds up collecting and sending the ones behind it
+        self._dispatch = ThreadPoolExecutor(max_workers=self.max_batch_size, thread_name_prefix="genai-dispatch")
+        self._worker = threading.Thread(target=self._run, name="genai-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, key, request):
+        future = Future()
+        with self._cond:
+            flight = self._streams.get(key)
+            if flight is not None:
+                # Same prompt is already streaming: take its text when it finishes
+                flight.futures.append(future)
+                return future
+            if key in self._calls:
+                self._calls[key].append(future)
+                return future
+            self._pending.append((key, request, future))
+            self._cond.notify()
+        return future
+
+    def stream(self, key, request):
+        # Concurrent identical prompts share one backend stream
+        with self._cond:
+            flight = self._streams.get(key)
+            if flight is None:
+                flight = TokenStream()
+                self._streams[key] = flight
+                self._pending.append((key, request, flight))
+                self._cond.notify()
+        return flight
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            flights = {key: waiter for key, _, waiter in batch if isinstance(waiter, TokenStream)}
+            waiters = OrderedDict()
+            for key, request, waiter in batch:
+                if key in flights:
+                    if waiter is not flights[key]:
+                        flights[key].futures.append(waiter)
+                else:
+                    waiters.setdefault(key, (request, []))[1].append(waiter)
+            self.batches += 1
+            self.requests += len(batch)
+            for key, request, _ in batch:
+                if flights.get(key) is not None:
+                    self._dispatch.submit(self._pump, key, request, flights.pop(key))
+            if waiters:
+                with self._cond:
+                    for key, (_, futures) in waiters.items():
+                        self._calls[key] = futures
+                self._dispatch.submit(self._send, waiters)
+
+    def _send(self, waiters):
+        try:
+            results = self.backend.generate_batch([request for request, _ in waiters.values()])
+            error = None
+        except Exception as e:
+            results, error = [None] * len(waiters), e
+        with self._cond:
+            for key in waiters:
+                self._calls.pop(key, None)
+        for (_, futures), text in zip(waiters.values(), results):
+            for future in futures:
+                if error is None:
+                    future.set_result(text)
+                else:
+                    future.set_exception(error)
+
+    def _pump(self, key, request, flight):
+        self.streams += 1
+        error = None
+        try:
+            for token in self.backend.stream(request):
+                flight.push(token)
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._streams.pop(key, None)
+        flight.finish(error)
+
+
+class TokenStream:
+    # Tokens of one backend stream, replayed to every session that asked for the same prompt
+    def __init__(self):
+        self.futures = []
+        self._tokens = []
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def push(self, token):
+        with self._cond:
+            self._tokens.append(token)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+        for future in self.futures:
+            if error is None:
+                future.set_result(self.text())
+            else:
+                future.set_exception(error)
+
+    def text(self):
+        with self._cond:
+            return "".join(self._tokens).strip()
+
+    def tokens(self, timeout=None):
+        seen = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: len(self._tokens) > seen or self._done, timeout):
+                    raise TimeoutError("Generation stream timed out")
+                new = self._tokens[seen:]
+                done, error = self._done, self._error
+            seen += len(new)
+            yield from new
+            if done and seen == len(self._tokens):
+                if error is not None:
+                    raise error
+                return
+
+
+class ContentGenerator:
+    def __init__(self, backend, cache=None, max_wait=0.02, timeout=120):
+        self.backend = backend
+        self.cache = cache or ResponseCache()
+        self.batcher = RequestBatcher(backend, max_wait=max_wait)
+        self.timeout = timeout
+
+    def generate(self, request):
+        key = request.cache_key(self.backend)
+        text = self.cache.get(key)
+        if text is None:
+            text = self.batcher.submit(key, request).result(timeout=self.timeout)
+            self.cache.put(key, text)
+        return text
+
+    def stream(self, request):
+        key = request.cache_key(self.backend)
+        text = self.cache.get(key)
+        if text is not None:
+            yield from _tokenize(text)
+            return
+        flight = self.batcher.stream(key, request)
+        yield from flight.tokens(timeout=self.timeout)
+        self.cache.put(key, flight.text())
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats.update({"backend": self.backend.name, "batches": self.batcher.batches,
+                      "batched_requests": self.batcher.requests, "streams": self.batcher.streams})
+        return stats
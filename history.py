@@ -0,0 +1,195 @@
+import copy
+import difflib
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_ROOT = os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'history')
+# Strings at least this long are stored as line splices instead of whole values
+TEXT_DIFF_MIN = 120
+
+
+def new_history_secret():
+    return secrets.token_urlsafe(24)
+
+def user_key(secret):
+    # Logs are named after a hash of the session's history secret, never anything typed into the form
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()[:24]
+
+
+# Structural deltas
+def diff(old, new, path=()):
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [['del', list(path) + [k]] for k in old if k not in new]
+        for k, value in new.items():
+            if k in old:
+                ops += diff(old[k], value, path + (k,))
+            else:
+                ops.append(['set', list(path) + [k], value])
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops += diff(old[i], new[i], path + (i,))
+        if len(new) < len(old):
+            ops.append(['trunc', list(path), len(new)])
+        for i in range(len(old), len(new)):
+            ops.append(['set', list(path) + [i], new[i]])
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    if isinstance(old, str) and isinstance(new, str) and len(old) + len(new) >= TEXT_DIFF_MIN:
+        old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        splices = [[i1, i2, new_lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+        if len(json.dumps(splices)) < len(json.dumps(new)):
+            return [['splice', list(path), splices]]
+    return [['set', list(path), new]]
+
+def apply(doc, ops):
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind, path = op[0], op[1]
+        if kind == 'set' and not path:
+            doc = copy.deepcopy(op[2])
+            continue
+        parent = doc
+        for part in path[:-1] if kind != 'trunc' else path:
+            parent = parent[part]
+        if kind == 'trunc':
+            del parent[op[2]:]
+            continue
+        last = path[-1]
+        if kind == 'del':
+            del parent[last]
+        elif kind == 'set':
+            if isinstance(parent, list) and last == len(parent):
+                parent.append(copy.deepcopy(op[2]))
+            else:
+                parent[last] = copy.deepcopy(op[2])
+        elif kind == 'splice':
+            lines = parent[last].splitlines(keepends=True)
+            # Apply from the end so earlier line numbers stay valid
+            for i1, i2, replacement in reversed(op[2]):
+                lines[i1:i2] = replacement
+            parent[last] = "".join(lines)
+    return doc
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        items = {}
+        for k, v in value.items():
+            items.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return items
+    if isinstance(value, list):
+        items = {}
+        for i, v in enumerate(value):
+            items.update(_flatten(v, f"{prefix}[{i}]"))
+        return items
+    return {prefix: value}
+
+def describe_changes(old, new):
+    # Field-level changes for display: (field, old value, new value), None = absent
+    before, after = _flatten(old or {}), _flatten(new or {})
+    changes = []
+    for field in list(before) + [f for f in after if f not in before]:
+        if before.get(field) != after.get(field):
+            changes.append((field, before.get(field), after.get(field)))
+    return changes
+
+
+# Storage
+class VersionStore:
+    # Append-only log per user: a full snapshot every `snapshot_every` versions and a
+    # structural delta against the previous version otherwise, so reconstructing any
+    # version applies at most `snapshot_every - 1` deltas.
+    def __init__(self, root=None, snapshot_every=10, max_cached=256):
+        self.root = root or os.environ.get('RESUME_HISTORY_DIR', DEFAULT_ROOT)
+        self.snapshot_every = snapshot_every
+        self.max_cached = max_cached
+        self._locks = {}
+        self._lock = threading.Lock()
+        # Parsed logs of recently used users, least recently used first
+        self._cache = OrderedDict()
+
+    def _user_lock(self, user):
+        with self._lock:
+            return self._locks.setdefault(user, threading.Lock())
+
+    def _log_path(self, user):
+        return os.path.join(self.root, user[:2], f"{user}.jsonl")
+
+    def _entries(self, user):
+        path = self._log_path(user)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._cache.get(user)
+            if cached and cached[0] == size:
+                self._cache.move_to_end(user)
+                return cached[1]
+        with open(path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            self._cache[user] = (size, entries)
+            self._cache.move_to_end(user)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return entries
+
+    def users(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.jsonl'):
+                    yield name[:-len('.jsonl')]
+
+    def versions(self, user):
+        return [{"version": e["v"], "saved_at": e["ts"], "kind": e["kind"], "bytes": e["bytes"]}
+                for e in self._entries(user)]
+
+    def latest_version(self, user):
+        entries = self._entries(user)
+        return entries[-1]["v"] if entries else 0
+
+    def get(self, user, version=None):
+        entries = self._entries(user)
+        if not entries:
+            return None
+        version = version or entries[-1]["v"]
+        if not 1 <= version <= len(entries):
+            raise KeyError(f"Version {version} does not exist")
+        start = version - 1
+        while entries[start]["kind"] != 'snapshot':
+            start -= 1
+        doc = entries[start]["data"]
+        for entry in entries[start + 1:version]:
+            doc = apply(doc, entry["ops"])
+        return copy.deepcopy(doc)
+
+    def save(self, user, data):
+        with self._user_lock(user):
+            entries = self._entries(user)
+            previous = self.get(user) if entries else None
+            if previous == data:
+                return entries[-1]["v"]
+            version = len(entries) + 1
+            entry = {"v": version, "ts": time.time()}
+            ops = diff(previous, data) if previous is not None else None
+            snapshot = json.dumps(data, separators=(',', ':'))
+            since_snapshot = next((n for n, e in enumerate(reversed(entries)) if e["kind"] == 'snapshot'), 0) + 1
+            if ops is None or since_snapshot >= self.snapshot_every or len(json.dumps(ops)) >= len(snapshot):
+                entry.update({"kind": 'snapshot', "data": data, "bytes": len(snapshot)})
+            else:
+                entry.update({"kind": 'delta', "ops": ops, "bytes": len(json.dumps(ops, separators=(',', ':')))})
+            path = self._log_path(user)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            return version
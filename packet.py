@@ -0,0 +1,208 @@
+import hashlib
+import json
+import sys
+import tempfile
+import zlib
+
+from rendering import ResumePDF, build_resume, resume_digest
+from template_registry import TemplateRegistry
+
+
+class _FileBuffer:
+    # Stands in for FPDF's in-memory output string: appends go straight to the file and
+    # len() reports the bytes written, which is all FPDF needs for xref offsets
+    def __init__(self, f):
+        self.f = f
+        self.size = 0
+
+    def __iadd__(self, s):
+        data = s.encode('latin-1', errors='ignore')
+        self.f.write(data)
+        self.size += len(data)
+        return self
+
+    def __len__(self):
+        return self.size
+
+
+class PacketPDF(ResumePDF):
+    # Many resumes in one document with a bookmark per candidate. Fonts and resources
+    # are written once for the whole packet, each finished page is compressed and
+    # spooled to a temp file, and the document is written straight to `out`, so memory
+    # stays flat however many candidates there are. Built on PyFPDF 1.7 internals.
+    def __init__(self, out, spool_dir=None):
+        super().__init__(None)
+        self.buffer = _FileBuffer(out)
+        self.outlines = []
+        self._outline_root = None
+        self._spool = tempfile.TemporaryFile(dir=spool_dir)
+        self._spooled = {}
+
+    def reset_graphics_state(self):
+        # Called between candidates so one template's colours and line width never
+        # leak into the next; the next add_page() then starts like a fresh document
+        self.font_family = ''
+        self.line_width = .567 / self.k
+        self.draw_color = '0 G'
+        self.fill_color = '0 g'
+        self.text_color = '0 g'
+        self.color_flag = 0
+
+    def bookmark(self, title, page):
+        self.outlines.append((title, page))
+
+    def _endpage(self):
+        super()._endpage()
+        content = zlib.compress(self.pages[self.page].encode('latin-1', errors='ignore'))
+        self._spooled[self.page] = (self._spool.tell(), len(content))
+        self._spool.write(content)
+        self.pages[self.page] = ''
+        # Photo data is read back from disk when written out (see _putimages)
+        for info in self.images.values():
+            info.pop('data', None)
+
+    def _putimages(self):
+        for name, info in sorted(self.images.items(), key=lambda item: item[1]['i']):
+            info['data'] = self._parsejpg(name)['data']
+            self._putimage(info)
+            del info['data']
+
+    def _putpages(self):
+        for n in range(1, self.page + 1):
+            self._newobj()
+            self._out('<</Type /Page')
+            self._out('/Parent 1 0 R')
+            self._out('/Resources 2 0 R')
+            if self.pdf_version > '1.3':
+                self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+            self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
+            self._out('endobj')
+            offset, length = self._spooled[n]
+            self._spool.seek(offset)
+            self._newobj()
+            self._out('<</Filter /FlateDecode /Length ' + str(length) + '>>')
+            self._putstream(self._spool.read(length))
+            self._out('endobj')
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(f"{3 + 2 * i} 0 R " for i in range(self.page)) + ']')
+        self._out('/Count ' + str(self.page))
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (self.fw_pt, self.fh_pt))
+        self._out('>>')
+        self._out('endobj')
+
+    def _putbookmarks(self):
+        first = self.n + 1
+        root = first + len(self.outlines)
+        for i, (title, page) in enumerate(self.outlines):
+            self._newobj()
+            self._out('<</Title ' + self._textstring(title))
+            self._out(f"/Parent {root} 0 R")
+            if i > 0:
+                self._out(f"/Prev {self.n - 1} 0 R")
+            if i < len(self.outlines) - 1:
+                self._out(f"/Next {self.n + 1} 0 R")
+            self._out('/Dest [%d 0 R /XYZ 0 %.2f null]' % (1 + 2 * page, self.fh_pt))
+            self._out('/Count 0>>')
+            self._out('endobj')
+        self._newobj()
+        self._outline_root = self.n
+        self._out(f"<</Type /Outlines /First {first} 0 R /Last {root - 1} 0 R /Count {len(self.outlines)}>>")
+        self._out('endobj')
+
+    def _putresources(self):
+        super()._putresources()
+        if self.outlines:
+            self._putbookmarks()
+
+    def _putcatalog(self):
+        super()._putcatalog()
+        if self._outline_root is not None:
+            self._out(f"/Outlines {self._outline_root} 0 R")
+            self._out('/PageMode /UseOutlines')
+
+    def close(self):
+        super().close()
+        self._spool.close()
+
+
+def read_records(path):
+    # JSON Lines are read one record at a time; a single JSON array is also accepted
+    with open(path, encoding='utf-8-sig') as f:
+        head = f.read(64).lstrip()
+        f.seek(0)
+        if head.startswith('['):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+TEXT_FIELDS = ('name', 'email', 'phone', 'job_role', 'location', 'linkedin', 'portfolio', 'summary', 'skills', 'photo')
+ENTRY_FIELDS = ('education', 'experience', 'projects')
+
+def _check_candidate(data, number):
+    # Templates assume the shape the input form produces; reject anything else up front
+    if not isinstance(data, dict):
+        raise ValueError(f"Candidate {number}: resume data is not a JSON object")
+    label = f"Candidate {number}" + (f" ({data['name']})" if isinstance(data.get('name'), str) and data['name'] else "")
+    for field in TEXT_FIELDS:
+        if field in data and not isinstance(data[field], str):
+            raise ValueError(f"{label}: '{field}' must be text")
+    for field in ENTRY_FIELDS:
+        if field not in data:
+            continue
+        entries = data[field]
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError(f"{label}: '{field}' must be a list of objects")
+        for entry in entries:
+            for key, value in entry.items():
+                if not isinstance(value, str):
+                    raise ValueError(f"{label}: '{field}.{key}' must be text")
+
+def write_packet(records, out, plans, default_template='Professional', spool_dir=None):
+    # Each record is either user_data itself or {"template": ..., "data": user_data}.
+    # Records are consumed lazily, so `records` can be a generator over a large file.
+    # `plans` is the template snapshot taken when the packet was requested.
+    pdf = PacketPDF(out, spool_dir)
+    packet_hash = hashlib.sha256()
+    candidates = 0
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"Candidate {candidates + 1} is not a JSON object")
+        template_name = record.get('template') or default_template
+        data = record.get('data', record)
+        _check_candidate(data, candidates + 1)
+        if not isinstance(template_name, str) or template_name not in plans:
+            raise ValueError(f"Unknown template '{template_name}' for candidate {candidates + 1}. "
+                             f"Available: {', '.join(plans)}")
+        plan = plans[template_name]
+        first_page = pdf.page + 1
+        pdf.reset_graphics_state()
+        build_resume(plan, data, pdf)
+        title = data.get('name') or f"Candidate {candidates + 1}"
+        if data.get('job_role'):
+            title += f" - {data['job_role']}"
+        pdf.bookmark(title, first_page)
+        packet_hash.update(resume_digest(plan, data).encode('ascii'))
+        candidates += 1
+    if not candidates:
+        raise ValueError("The packet has no candidates")
+    # Same records in the same order always produce the same file
+    pdf.make_deterministic(packet_hash.hexdigest())
+    pdf.close()
+    return {"candidates": candidates, "pages": pdf.page, "bytes": len(pdf.buffer)}
+
+def write_packet_file(records_path, out_path, plans, default_template='Professional'):
+    with open(out_path, 'wb') as out:
+        return write_packet(read_records(records_path), out, plans, default_template)
+
+
+if __name__ == '__main__':
+    # python packet.py candidates.jsonl packet.pdf [template]
+    if len(sys.argv) < 3:
+        print("Usage: python packet.py candidates.jsonl packet.pdf [template]")
+        sys.exit(1)
+    summary = write_packet_file(sys.argv[1], sys.argv[2], TemplateRegistry().plans(), *sys.argv[3:4])
+    print(f"Wrote {summary['candidates']} candidates, {summary['pages']} pages, {summary['bytes']} bytes")
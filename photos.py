@@ -0,0 +1,117 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow not installed - photo uploads are disabled
+    Image = None
+
+UPLOADS_ENABLED = Image is not None
+
+DEFAULT_ROOT = os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'photos')
+# Uploads are normalised to at most this many pixels on the long side; every slot
+# variant is cut from that master instead of the original multi-megabyte photo
+MASTER_SIZE = 1600
+MAX_INFOS = 64
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class PhotoStore:
+    # Profile photos processed once per upload and cached on disk by content hash:
+    #   <id>.jpg              upright RGB master, downscaled to MASTER_SIZE
+    #   <id>-<w>x<h>.jpg      cropped to a template slot's aspect at print resolution
+    # Renders only ever read the small slot variants.
+    def __init__(self, root=None, dpi=None, quality=None, max_upload_mb=None):
+        self.root = root or os.environ.get('RESUME_PHOTO_DIR', DEFAULT_ROOT)
+        self.dpi = dpi or int(os.environ.get('RESUME_PHOTO_DPI', 300))
+        self.quality = quality or int(os.environ.get('RESUME_PHOTO_QUALITY', 85))
+        self.max_upload = int(float(max_upload_mb or os.environ.get('RESUME_PHOTO_MAX_MB', 15)) * 1024 * 1024)
+
+    def _path(self, photo_id, suffix=''):
+        return os.path.join(self.root, photo_id[:2], f"{photo_id}{suffix}.jpg")
+
+    def _save(self, image, path, quality):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            # Baseline JPEG is embedded in the PDF as-is, with no re-encoding at render time
+            image.save(f, 'JPEG', quality=quality, optimize=True)
+        os.replace(tmp, path)
+
+    def add(self, data):
+        # Returns the photo id; uploading the same bytes again is a no-op
+        if Image is None:
+            raise RuntimeError("Photo uploads need Pillow: pip install Pillow")
+        if len(data) > self.max_upload:
+            raise ValueError(f"Photo is larger than {self.max_upload // (1024 * 1024)} MB")
+        photo_id = hashlib.sha256(data).hexdigest()[:32]
+        if os.path.exists(self._path(photo_id)):
+            return photo_id
+        try:
+            image = Image.open(io.BytesIO(data))
+            # Let the JPEG decoder scale down while decoding instead of after
+            image.draft('RGB', (MASTER_SIZE, MASTER_SIZE))
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.thumbnail((MASTER_SIZE, MASTER_SIZE), Image.LANCZOS)
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            raise ValueError("The photo could not be read. Please upload a JPEG, PNG or WebP image.")
+        self._save(image, self._path(photo_id), 92)
+        return photo_id
+
+    def exists(self, photo_id):
+        # Ids also arrive from uploaded packet records, so anything else is rejected
+        return bool(_ID_RE.match(str(photo_id))) and os.path.exists(self._path(photo_id))
+
+    def slot_path(self, photo_id, w_mm, h_mm):
+        # Variant for a w x h mm slot, made on first use. None if the photo is unknown,
+        # or if it has to be made here and Pillow is missing.
+        if not _ID_RE.match(str(photo_id)):
+            return None
+        width, height = round(w_mm / 25.4 * self.dpi), round(h_mm / 25.4 * self.dpi)
+        path = self._path(photo_id, f"-{width}x{height}")
+        if os.path.exists(path):
+            return path
+        if Image is None or not self.exists(photo_id):
+            return None
+        with Image.open(self._path(photo_id)) as master:
+            # Never upscale: a small master is cropped to the slot's aspect at its own size
+            scale = min(1.0, master.width / width, master.height / height)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            # Centre slightly above the middle, where faces usually are
+            variant = ImageOps.fit(master, size, Image.LANCZOS, centering=(0.5, 0.4))
+        self._save(variant, path, self.quality)
+        return path
+
+
+_infos = OrderedDict()
+_infos_lock = threading.Lock()
+
+def embed_photo(pdf, path, x, y, w, h):
+    # The JPEG is parsed once per process and every document that shows it gets its
+    # own copy of the parsed info (FPDF writes object numbers into it); within one
+    # document the image object is written once however many pages use it.
+    if path not in pdf.images:
+        with _infos_lock:
+            info = _infos.get(path)
+            if info is not None:
+                _infos.move_to_end(path)
+        if info is None:
+            info = pdf._parsejpg(path)
+            with _infos_lock:
+                _infos[path] = info
+                while len(_infos) > MAX_INFOS:
+                    _infos.popitem(last=False)
+        pdf.images[path] = dict(info, i=len(pdf.images) + 1)
+    pdf.image(path, x, y, w, h)
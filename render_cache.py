@@ -0,0 +1,373 @@
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MB = 1024 * 1024
+
+
+class LocalLRU:
+    # In-process tier: rendered bytes by key, bounded by total size
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+# Shared tiers. Any object with get/put/acquire/release works; acquire() must be an
+# atomic "set if not exists" with a TTL so a crashed node cannot hold a lock forever.
+# It returns an owner token (None if the lock is taken), and release() only removes the
+# lock while it still holds that token, so a node whose render outlived the TTL never
+# frees a lock another node has since taken over.
+class DirectoryTier:
+    # A directory every replica can reach (NFS, a shared volume, or just local disk in tests)
+    def __init__(self, root, ttl=24 * 3600):
+        self.root = root
+        self.ttl = ttl
+        self._puts = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key):
+        path = self._path(key, '.bin')
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, value):
+        path = self._path(key, '.bin')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(value)
+        os.replace(tmp, path)
+        self._puts += 1
+        if self._puts % 256 == 0:
+            self.purge_expired()
+
+    def acquire(self, key, ttl):
+        path = self._path(key, '.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        token = secrets.token_hex(16)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                try:
+                    if time.time() < self._lock_expiry(path, ttl):
+                        return None
+                    os.remove(path)  # Left behind by a node that died or overran its TTL
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"{token} {time.time() + ttl}")
+            return token
+        return None
+
+    def _lock_expiry(self, path, ttl):
+        # The holder's own expiry; a lock file still being written falls back to its age
+        with open(path) as f:
+            parts = f.read().split()
+        try:
+            return float(parts[1])
+        except (IndexError, ValueError):
+            return os.path.getmtime(path) + ttl
+
+    def release(self, key, token):
+        path = self._path(key, '.lock')
+        try:
+            with open(path) as f:
+                if f.read().split()[:1] != [token]:
+                    return  # Expired and taken over by another node
+            os.remove(path)
+        except OSError:
+            pass
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+
+class KVTier:
+    # Client for KVServer below: one short-lived connection per call keeps it thread-safe
+    def __init__(self, host, port, timeout=2.0):
+        self.address = (host, port)
+        self.timeout = timeout
+
+    def _call(self, line, payload=b''):
+        with socket.create_connection(self.address, timeout=self.timeout) as conn:
+            conn.sendall(line.encode('ascii') + b'\n' + payload)
+            f = conn.makefile('rb')
+            reply = f.readline().decode('ascii').split()
+            if reply and reply[0] == 'VALUE':
+                return f.read(int(reply[1]))
+            return reply[0] if reply else None
+
+    def get(self, key):
+        try:
+            value = self._call(f"GET {key}")
+        except OSError:
+            return None  # A down cache tier means a re-render, not a failed request
+        return value if isinstance(value, bytes) else None
+
+    def put(self, key, value):
+        try:
+            self._call(f"SET {key} 0 {len(value)}", value)
+        except OSError:
+            pass
+
+    def acquire(self, key, ttl):
+        token = secrets.token_hex(16)
+        try:
+            return token if self._call(f"SETNX lock:{key} {ttl:g} {token}") == '1' else None
+        except OSError:
+            return token  # Without the shared tier, fall back to rendering locally
+
+    def release(self, key, token):
+        try:
+            self._call(f"DELIF lock:{key} {token}")
+        except OSError:
+            pass
+
+
+class KVServer(socketserver.ThreadingTCPServer):
+    # Minimal line protocol over TCP, enough for the render cache:
+    #   GET key             -> VALUE <n>\n<bytes> | NONE
+    #   SET key ttl n\n<n>  -> OK | TOOBIG (ttl 0 = until evicted)
+    #   SETNX key ttl [value] -> 1 | 0
+    #   DEL key             -> OK
+    #   DELIF key value     -> 1 | 0  (delete only while the key still holds `value`)
+    # Values are evicted least recently used first once `max_bytes` is exceeded.
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, max_bytes=256 * MB):
+        super().__init__(address, _KVHandler)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, key):
+        item = self.items.get(key)
+        if item is None:
+            return None
+        if item[1] and item[1] < time.time():
+            self.remove(key)
+            return None
+        self.items.move_to_end(key)
+        return item[0]
+
+    def store(self, key, value, ttl):
+        # A value bigger than the whole cache would only flush everything else
+        if len(value) > self.max_bytes:
+            return False
+        self.remove(key)
+        self.items[key] = (value, time.time() + ttl if ttl else 0)
+        self.size += len(value)
+        while self.size > self.max_bytes and self.items:
+            self.remove(next(iter(self.items)))
+        return True
+
+    def remove(self, key):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self.size -= len(item[0])
+
+
+class _KVHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        parts = self.rfile.readline().decode('ascii', errors='replace').split()
+        if not parts:
+            return
+        command, server = parts[0].upper(), self.server
+        if command == 'SET' and len(parts) == 4:
+            if int(parts[3]) > server.max_bytes:
+                self.wfile.write(b'TOOBIG\n')
+                return
+            value = self.rfile.read(int(parts[3]))  # Read before locking so slow clients don't block others
+        with server.lock:
+            if command == 'GET' and len(parts) == 2:
+                value = server.lookup(parts[1])
+                reply = b'NONE\n' if value is None else b'VALUE %d\n' % len(value) + value
+            elif command == 'SET' and len(parts) == 4:
+                reply = b'OK\n' if server.store(parts[1], value, float(parts[2])) else b'TOOBIG\n'
+            elif command == 'SETNX' and len(parts) in (3, 4):
+                if server.lookup(parts[1]) is None:
+                    server.store(parts[1], parts[3].encode('ascii') if len(parts) == 4 else b'1', float(parts[2]))
+                    reply = b'1\n'
+                else:
+                    reply = b'0\n'
+            elif command == 'DEL' and len(parts) == 2:
+                server.remove(parts[1])
+                reply = b'OK\n'
+            elif command == 'DELIF' and len(parts) == 3:
+                if server.lookup(parts[1]) == parts[2].encode('ascii'):
+                    server.remove(parts[1])
+                    reply = b'1\n'
+                else:
+                    reply = b'0\n'
+            else:
+                reply = b'ERROR\n'
+        self.wfile.write(reply)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class RenderCache:
+    # Two tiers: an in-process LRU in front of a tier shared by every replica. Identical
+    # concurrent renders collapse into one: in-process through single-flight, and across
+    # replicas through a lock in the shared tier that other nodes wait on.
+    def __init__(self, local, shared=None, lock_ttl=60.0, poll_interval=0.05):
+        self.local = local
+        self.shared = shared
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {"local_hits": 0, "shared_hits": 0, "renders": 0,
+                         "collapsed": 0, "remote_waits": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get_or_render(self, key, render):
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count("collapsed")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = self._fetch_or_render(key, render)
+            self.local.put(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _fetch_or_render(self, key, render):
+        if self.shared is None:
+            self._count("renders")
+            return render()
+        deadline = time.monotonic() + self.lock_ttl
+        waited = False
+        while True:
+            value = self.shared.get(key)
+            if value is not None:
+                self._count("shared_hits")
+                return value
+            token = self.shared.acquire(key, self.lock_ttl)
+            if token or time.monotonic() > deadline:
+                break
+            # Another replica is rendering the same thing: wait for its result
+            if not waited:
+                self._count("remote_waits")
+                waited = True
+            time.sleep(self.poll_interval)
+        try:
+            self._count("renders")
+            value = render()
+            self.shared.put(key, value)
+            return value
+        finally:
+            if token:
+                self.shared.release(key, token)
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self.counters)
+        hits = metrics["local_hits"] + metrics["shared_hits"] + metrics["collapsed"]
+        metrics["hit_rate"] = hits / (hits + metrics["renders"]) if hits + metrics["renders"] else None
+        metrics["local_bytes"] = self.local.size
+        metrics["shared_tier"] = type(self.shared).__name__ if self.shared else None
+        return metrics
+
+
+def create_render_cache():
+    # RESUME_RENDER_CACHE: 'dir' (default, RESUME_RENDER_CACHE_DIR), 'kv' (RESUME_RENDER_CACHE_ADDR
+    # host:port of `python render_cache.py serve`), or 'local' for no shared tier
+    local = LocalLRU(int(float(os.environ.get('RESUME_RENDER_CACHE_LOCAL_MB', 64)) * MB))
+    kind = os.environ.get('RESUME_RENDER_CACHE', 'dir')
+    if kind == 'dir':
+        root = os.environ.get('RESUME_RENDER_CACHE_DIR') or \
+            os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'render_cache')
+        return RenderCache(local, DirectoryTier(root))
+    if kind == 'kv':
+        host, _, port = os.environ.get('RESUME_RENDER_CACHE_ADDR', 'localhost:8503').rpartition(':')
+        return RenderCache(local, KVTier(host or 'localhost', int(port)))
+    if kind == 'local':
+        return RenderCache(local)
+    raise ValueError(f"Unknown RESUME_RENDER_CACHE '{kind}'. Available: dir, kv, local")
+
+
+if __name__ == '__main__':
+    # python render_cache.py serve [port] [host]
+    # The protocol has no authentication: only bind beyond localhost on a private network
+    if len(sys.argv) < 2 or sys.argv[1] != 'serve':
+        print("Usage: python render_cache.py serve [port] [host]")
+        sys.exit(1)
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8503
+    host = sys.argv[3] if len(sys.argv) > 3 else '127.0.0.1'
+    max_bytes = int(float(os.environ.get('RESUME_RENDER_CACHE_SERVER_MB', 256)) * MB)
+    print(f"Serving render cache on {host}:{port} ({max_bytes // MB} MB)")
+    KVServer((host, port), max_bytes).serve_forever()
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from multiprocessing import spawn
+
+from packet import write_packet_file
+from rendering import render_pdf_bytes
+from template_registry import TemplateRegistry
+
+PREWARM_ENV = 'RESUME_RENDER_PREWARM'
+MAIN_PATH_ENV = 'RESUME_RENDER_MAIN_PATH'
+
+# Exercises every section of every template: fonts, width tables and layout caches
+WARMUP_DATA = {
+    "name": "Warm Up",
+    "email": "warmup@example.com",
+    "phone": "000-000-0000",
+    "job_role": "Software Engineer",
+    "location": "Anywhere",
+    "linkedin": "linkedin.com/in/warmup",
+    "portfolio": "warmup.example.com",
+    "summary": "Results-driven engineer with a track record of delivering reliable software on time.",
+    "education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2015", "gpa": "3.8"}],
+    "experience": [{"position": "Engineer", "company": "Acme", "duration": "2015 - Present",
+                    "description": "Built services used by thousands of customers\nLed a team of five engineers"}],
+    "projects": [{"title": "Resume Generator", "description": "Generates PDF resumes from templates.",
+                  "technologies": "Python, FPDF"}],
+    "skills": "Python, SQL, Communication, Leadership",
+}
+
+
+def _process_start_time():
+    # Wall-clock start of this process, so metrics cover interpreter and import time too
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+PROCESS_STARTED_AT = _process_start_time()
+
+
+def warm_up():
+    started = time.perf_counter()
+    for plan in TemplateRegistry().plans().values():
+        render_pdf_bytes(plan, WARMUP_DATA)
+    return time.perf_counter() - started
+
+# Runs inside the fork server when it preloads this module, so every worker forked
+# from it starts with warm imports and caches shared copy-on-write
+if os.environ.get(PREWARM_ENV) == '1':
+    # Workers only run functions from this module, so they never need the launching
+    # script. Marking it as loaded stops every worker from re-running the Streamlit
+    # entry point as __mp_main__ when it starts.
+    if os.environ.get(MAIN_PATH_ENV):
+        sys.modules['__main__'].__file__ = os.environ[MAIN_PATH_ENV]
+    WARMUP_SECONDS = warm_up()
+
+
+# Workers receive the compiled plan rather than a template name, so a render always
+# finishes on the template version it started with, even if the file changes meanwhile
+def _render(plan, data):
+    started = time.perf_counter()
+    pdf_bytes = render_pdf_bytes(plan, data)
+    return pdf_bytes, time.perf_counter() - started
+
+def _render_packet(records_path, out_path, plans, default_template):
+    return write_packet_file(records_path, out_path, plans, default_template)
+
+
+class RenderPool:
+    def __init__(self, processes=None):
+        self.processes = processes or int(os.environ.get('RESUME_RENDER_WORKERS', os.cpu_count() or 2))
+        self.first_render_at = None
+        self.renders = 0
+        self.render_seconds = 0.0
+        self._lock = threading.Lock()
+        pool_started = time.time()
+        # The fork server is a fresh single-threaded process, so forking from it is safe
+        # even though the Streamlit server that owns this pool is multithreaded
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['render_workers'])
+        os.environ[PREWARM_ENV] = '1'
+        os.environ[MAIN_PATH_ENV] = spawn.get_preparation_data('render').get('init_main_from_path', '')
+        # The fork server ignores the parent's sys.path, so point it at this module
+        # even when the app was launched from another directory
+        python_path = os.environ.get('PYTHONPATH')
+        os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), python_path]))
+        try:
+            self._pool = ctx.Pool(self.processes)
+        finally:
+            os.environ.pop(PREWARM_ENV, None)
+            os.environ.pop(MAIN_PATH_ENV, None)
+            if python_path is None:
+                os.environ.pop('PYTHONPATH', None)
+            else:
+                os.environ['PYTHONPATH'] = python_path
+        self.ready_at = time.time()
+        self.startup_seconds = self.ready_at - pool_started
+
+    def render(self, plan, data, timeout=60):
+        pdf_bytes, seconds = self._pool.apply_async(_render, (plan, data)).get(timeout)
+        with self._lock:
+            self.renders += 1
+            self.render_seconds += seconds
+            if self.first_render_at is None:
+                self.first_render_at = time.time()
+        return pdf_bytes
+
+    def render_packet(self, records_path, out_path, plans, default_template, timeout=600):
+        # The packet is streamed to `out_path` by the worker; only a summary comes back
+        return self._pool.apply_async(_render_packet, (records_path, out_path, plans, default_template)).get(timeout)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.processes,
+                "pool_startup_seconds": self.startup_seconds,
+                "process_start_to_pool_ready_seconds": self.ready_at - PROCESS_STARTED_AT,
+                "process_start_to_first_render_seconds":
+                    self.first_render_at - PROCESS_STARTED_AT if self.first_render_at else None,
+                "renders": self.renders,
+                "avg_render_seconds": self.render_seconds / self.renders if self.renders else None,
+            }
+
+    def close(self):
+        self._pool.terminate()
+
+
+def create_render_pool():
+    # Falls back to in-process rendering where fork servers are unavailable or disabled
+    if os.environ.get('RESUME_RENDER_WORKERS') == '0':
+        return None
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    return RenderPool()
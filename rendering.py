@@ -0,0 +1,638 @@
+from fpdf import FPDF
+import json
+import hashlib
+from datetime import datetime, timezone
+from textlayout import text_block
+from photos import PhotoStore, embed_photo
+
+# Template definitions live in templates/*.json and are compiled by template_registry.
+# Core fonts a template may use
+CORE_FONTS = ("Arial", "Helvetica", "Times", "Courier")
+
+# Fixed metadata for deterministic renders
+PDF_CREATION_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PDF_PRODUCER = "Professional Resume Generator"
+
+# Processed profile photos, shared by every render in the process
+PHOTOS = PhotoStore()
+
+class ResumePDF(FPDF):
+    def __init__(self, template_color):
+        super().__init__()
+        self.template_color = template_color
+        self.document_id = None
+        
+    def hex_to_rgb(self, hex_color):
+        hex_color = hex_color.lstrip('#')
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    
+    def make_deterministic(self, content_hash):
+        # Pin the timestamp and producer and derive /ID from the input hash,
+        # so identical inputs always produce byte-identical files
+        self.document_id = content_hash[:32].upper()
+        if hasattr(self, 'set_creation_date'):
+            self.set_creation_date(PDF_CREATION_DATE)
+            self.set_producer(PDF_PRODUCER)
+    
+    # fpdf2 hook for the trailer /ID
+    def file_id(self):
+        if self.document_id is None:
+            return super().file_id()
+        return f"<{self.document_id}><{self.document_id}>"
+    
+    # PyFPDF 1.7 hooks: it stamps datetime.now() and writes no /ID
+    def _putinfo(self):
+        if self.document_id is None:
+            return super()._putinfo()
+        self._out('/Producer ' + self._textstring(PDF_PRODUCER))
+        for key in ('title', 'subject', 'author', 'keywords', 'creator'):
+            if hasattr(self, key):
+                self._out(f"/{key.capitalize()} " + self._textstring(getattr(self, key)))
+        self._out('/CreationDate ' + self._textstring('D:' + PDF_CREATION_DATE.strftime('%Y%m%d%H%M%S')))
+    
+    def _puttrailer(self):
+        super()._puttrailer()
+        if self.document_id is not None:
+            self._out(f"/ID [<{self.document_id}><{self.document_id}>]")
+
+def place_photo(pdf, data, slot):
+    # Draws the candidate's photo into a layout slot; False when there is none to draw
+    path = PHOTOS.slot_path(data['photo'], slot['w'], slot['h']) if data.get('photo') else None
+    if path is None:
+        return False
+    embed_photo(pdf, path, slot['x'], slot['y'], slot['w'], slot['h'])
+    return True
+
+def create_professional_resume(plan, data, pdf=None):
+    if pdf is None:
+        pdf = ResumePDF(plan.color)
+    pdf.add_page()
+    color_rgb = plan.color_rgb
+    layout = plan.layout
+    font, headings = layout['font'], layout['headings']
+    
+    # Header with background
+    pdf.set_fill_color(*color_rgb)
+    pdf.rect(0, 0, 210, layout['header_height'], 'F')
+    
+    # Name
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font(font, 'B', layout['name_size'])
+    pdf.cell(0, 20, data.get('name', ''), 0, 1, 'C')
+    
+    # Contact Info
+    pdf.set_font(font, '', 10)
+    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
+    pdf.cell(0, 8, contact, 0, 1, 'C')
+    
+    if data.get('linkedin') or data.get('portfolio'):
+        links = f"{data.get('linkedin', '')}  {data.get('portfolio', '')}"
+        pdf.cell(0, 8, links, 0, 1, 'C')
+    
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(5)
+    
+    # Profile Summary
+    if data.get('summary'):
+        pdf.set_fill_color(*color_rgb)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['summary'], 0, 1, 'L', True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 5, data['summary'])
+        pdf.ln(3)
+    
+    # Education
+    if data.get('education'):
+        pdf.set_fill_color(*color_rgb)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['education'], 0, 1, 'L', True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        
+        for edu in data['education']:
+            if edu.get('degree'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 5, f"{edu.get('institution', '')} | {edu.get('year', '')}", 0, 1)
+                if edu.get('gpa'):
+                    pdf.cell(0, 5, f"GPA: {edu['gpa']}", 0, 1)
+                pdf.ln(2)
+    
+    # Experience
+    if data.get('experience'):
+        pdf.set_fill_color(*color_rgb)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['experience'], 0, 1, 'L', True)
+        pdf.set_text_color(0, 0, 0)
+        
+        for exp in data['experience']:
+            if exp.get('position'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, exp.get('position', ''), 0, 1)
+                pdf.set_font(font, 'I', 10)
+                pdf.cell(0, 5, f"{exp.get('company', '')} | {exp.get('duration', '')}", 0, 1)
+                pdf.set_font(font, '', 10)
+                if exp.get('description'):
+                    responsibilities = exp['description'].split('\n')
+                    for resp in responsibilities:
+                        if resp.strip():
+                            pdf.cell(5)
+                            text_block(pdf, 0, 5, f"- {resp.strip()}")
+                pdf.ln(2)
+    
+    # Projects
+    if data.get('projects'):
+        pdf.set_fill_color(*color_rgb)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['projects'], 0, 1, 'L', True)
+        pdf.set_text_color(0, 0, 0)
+        
+        for proj in data['projects']:
+            if proj.get('title'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, proj.get('title', ''), 0, 1)
+                pdf.set_font(font, '', 10)
+                if proj.get('description'):
+                    text_block(pdf, 0, 5, proj['description'])
+                if proj.get('technologies'):
+                    pdf.set_font(font, 'I', 9)
+                    text_block(pdf, 0, 5, f"Technologies: {proj['technologies']}")
+                pdf.ln(2)
+    
+    # Skills
+    if data.get('skills'):
+        pdf.set_fill_color(*color_rgb)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['skills'], 0, 1, 'L', True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 5, data['skills'])
+    
+    return pdf
+
+def create_modern_resume(plan, data, pdf=None):
+    if pdf is None:
+        pdf = ResumePDF(plan.color)
+    pdf.add_page()
+    color_rgb = plan.color_rgb
+    layout = plan.layout
+    font, headings = layout['font'], layout['headings']
+    sidebar = layout['sidebar_width']
+    main_x = sidebar + 5
+    
+    # Left sidebar background
+    pdf.set_fill_color(*color_rgb)
+    pdf.rect(0, 0, sidebar, 297, 'F')
+    
+    # Photo at the top of the sidebar pushes the name and contact details down
+    top = 20
+    if place_photo(pdf, data, layout['photo']):
+        top = layout['photo']['y'] + layout['photo']['h'] + 5
+    
+    # Name in sidebar
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font(font, 'B', layout['name_size'])
+    pdf.set_xy(5, top)
+    text_block(pdf, sidebar - 10, 8, data.get('name', ''), 0, 'C')
+    
+    pdf.set_font(font, '', 9)
+    pdf.set_xy(5, top + 25)
+    
+    # Contact in sidebar
+    if data.get('phone'):
+        pdf.cell(sidebar - 10, 5, data['phone'], 0, 1, 'C')
+    if data.get('email'):
+        text_block(pdf, sidebar - 10, 5, data['email'], 0, 'C')
+    if data.get('location'):
+        pdf.set_xy(5, pdf.get_y())
+        text_block(pdf, sidebar - 10, 5, data['location'], 0, 'C')
+    
+    # Skills in sidebar
+    if data.get('skills'):
+        pdf.set_xy(5, pdf.get_y() + 10)
+        pdf.set_font(font, 'B', 11)
+        pdf.cell(sidebar - 10, 6, headings['skills'], 0, 1, 'C')
+        pdf.set_font(font, '', 8)
+        skills_list = data['skills'].split(',')
+        for skill in skills_list[:layout['max_skills']]:
+            pdf.set_x(5)
+            text_block(pdf, sidebar - 10, 5, f"- {skill.strip()}", 0, 'L')
+    
+    # Main content area
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_xy(main_x, 20)
+    
+    # Summary
+    if data.get('summary'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['summary'], 0, 1)
+        pdf.set_x(main_x)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 5, data['summary'])
+        pdf.ln(3)
+    
+    # Experience
+    if data.get('experience'):
+        pdf.set_x(main_x)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['experience'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for exp in data['experience']:
+            if exp.get('position'):
+                pdf.set_x(main_x)
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, exp.get('position', ''), 0, 1)
+                pdf.set_x(main_x)
+                pdf.set_font(font, 'I', 10)
+                pdf.cell(0, 5, f"{exp.get('company', '')} | {exp.get('duration', '')}", 0, 1)
+                pdf.set_x(main_x)
+                pdf.set_font(font, '', 9)
+                if exp.get('description'):
+                    for line in exp['description'].split('\n'):
+                        if line.strip():
+                            pdf.set_x(main_x)
+                            text_block(pdf, 0, 5, f"- {line.strip()}")
+                pdf.ln(2)
+    
+    # Education
+    if data.get('education'):
+        pdf.set_x(main_x)
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['education'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for edu in data['education']:
+            if edu.get('degree'):
+                pdf.set_x(main_x)
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
+                pdf.set_x(main_x)
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 5, f"{edu.get('institution', '')} | {edu.get('year', '')}", 0, 1)
+                pdf.ln(2)
+    
+    return pdf
+
+def create_minimal_resume(plan, data, pdf=None):
+    if pdf is None:
+        pdf = ResumePDF(plan.color)
+    pdf.add_page()
+    layout = plan.layout
+    font, headings = layout['font'], layout['headings']
+    rule_color = layout['rule_color']
+    
+    # Name
+    pdf.set_font(font, 'B', layout['name_size'])
+    pdf.cell(0, 15, data.get('name', ''), 0, 1, 'C')
+    
+    # Contact
+    pdf.set_font(font, '', 10)
+    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
+    pdf.cell(0, 6, contact, 0, 1, 'C')
+    pdf.ln(5)
+    
+    # Horizontal line
+    pdf.set_draw_color(*rule_color)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    
+    # Summary
+    if data.get('summary'):
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 5, data['summary'])
+        pdf.ln(5)
+    
+    # Experience
+    if data.get('experience'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['experience'], 0, 1)
+        pdf.set_draw_color(*rule_color)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(3)
+        
+        for exp in data['experience']:
+            if exp.get('position'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(95, 6, exp.get('position', ''), 0, 0)
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 6, exp.get('duration', ''), 0, 1, 'R')
+                pdf.set_font(font, 'I', 10)
+                pdf.cell(0, 5, exp.get('company', ''), 0, 1)
+                pdf.set_font(font, '', 9)
+                if exp.get('description'):
+                    for line in exp['description'].split('\n'):
+                        if line.strip():
+                            text_block(pdf, 0, 5, f"- {line.strip()}")
+                pdf.ln(3)
+    
+    # Education
+    if data.get('education'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['education'], 0, 1)
+        pdf.set_draw_color(*rule_color)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(3)
+        
+        for edu in data['education']:
+            if edu.get('degree'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(95, 6, edu.get('degree', ''), 0, 0)
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 6, edu.get('year', ''), 0, 1, 'R')
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 5, edu.get('institution', ''), 0, 1)
+                pdf.ln(2)
+    
+    # Projects
+    if data.get('projects'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['projects'], 0, 1)
+        pdf.set_draw_color(*rule_color)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(3)
+        
+        for proj in data['projects']:
+            if proj.get('title'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, proj.get('title', ''), 0, 1)
+                pdf.set_font(font, '', 9)
+                if proj.get('description'):
+                    text_block(pdf, 0, 5, proj['description'])
+                pdf.ln(2)
+    
+    # Skills
+    if data.get('skills'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.cell(0, 8, headings['skills'], 0, 1)
+        pdf.set_draw_color(*rule_color)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(3)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 5, data['skills'])
+    
+    return pdf
+
+def create_creative_resume(plan, data, pdf=None):
+    if pdf is None:
+        pdf = ResumePDF(plan.color)
+    pdf.add_page()
+    color_rgb = plan.color_rgb
+    layout = plan.layout
+    font, headings = layout['font'], layout['headings']
+    panel_color = layout['panel_color']
+    
+    # Header with angled design
+    pdf.set_fill_color(*color_rgb)
+    pdf.rect(0, 0, 210, layout['header_height'], 'F')
+    place_photo(pdf, data, layout['photo'])
+    
+    # Name
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font(font, 'B', layout['name_size'])
+    pdf.set_xy(15, 15)
+    pdf.cell(0, 10, data.get('name', ''), 0, 1)
+    
+    # Job Role
+    if data.get('job_role'):
+        pdf.set_font(font, '', 12)
+        pdf.set_x(15)
+        pdf.cell(0, 8, data['job_role'], 0, 1)
+    
+    # Contact
+    pdf.set_font(font, '', 9)
+    pdf.set_x(15)
+    contact = f"{data.get('email', '')} | {data.get('phone', '')} | {data.get('location', '')}"
+    pdf.cell(0, 6, contact, 0, 1)
+    
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(8)
+    
+    # Two column layout
+    col_width = layout['column_width']
+    right_x = col_width + 20
+    
+    # Left column - Summary and Skills
+    pdf.set_xy(15, 60)
+    if data.get('summary'):
+        pdf.set_fill_color(*panel_color)
+        pdf.rect(15, pdf.get_y(), col_width, 5, 'F')
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(col_width, 5, headings['summary'], 0, 1)
+        pdf.set_x(15)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 9)
+        text_block(pdf, col_width, 5, data['summary'])
+        pdf.ln(3)
+    
+    # Skills
+    if data.get('skills'):
+        pdf.set_x(15)
+        pdf.set_fill_color(*panel_color)
+        pdf.rect(15, pdf.get_y(), col_width, 5, 'F')
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(col_width, 5, headings['skills'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 9)
+        pdf.set_x(15)
+        text_block(pdf, col_width, 5, data['skills'])
+    
+    # Right column - Experience and Education
+    pdf.set_xy(right_x, 60)
+    
+    if data.get('experience'):
+        pdf.set_fill_color(*panel_color)
+        pdf.rect(right_x, pdf.get_y(), col_width, 5, 'F')
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(col_width, 5, headings['experience'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for exp in data['experience'][:layout['max_experience']]:
+            if exp.get('position'):
+                pdf.set_x(right_x)
+                pdf.set_font(font, 'B', 10)
+                pdf.cell(0, 5, exp.get('position', ''), 0, 1)
+                pdf.set_x(right_x)
+                pdf.set_font(font, 'I', 9)
+                pdf.cell(0, 4, f"{exp.get('company', '')} - {exp.get('duration', '')}", 0, 1)
+                pdf.set_x(right_x)
+                pdf.set_font(font, '', 8)
+                if exp.get('description'):
+                    lines = exp['description'].split('\n')[:layout['max_bullets']]
+                    for line in lines:
+                        if line.strip():
+                            pdf.set_x(right_x)
+                            text_block(pdf, col_width, 4, f"- {line.strip()}")
+                pdf.ln(2)
+    
+    if data.get('education'):
+        pdf.set_x(right_x)
+        pdf.set_fill_color(*panel_color)
+        pdf.rect(right_x, pdf.get_y(), col_width, 5, 'F')
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(col_width, 5, headings['education'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for edu in data['education']:
+            if edu.get('degree'):
+                pdf.set_x(right_x)
+                pdf.set_font(font, 'B', 10)
+                pdf.cell(0, 5, edu.get('degree', ''), 0, 1)
+                pdf.set_x(right_x)
+                pdf.set_font(font, '', 9)
+                pdf.cell(0, 4, edu.get('institution', ''), 0, 1)
+    
+    return pdf
+
+def create_executive_resume(plan, data, pdf=None):
+    if pdf is None:
+        pdf = ResumePDF(plan.color)
+    pdf.add_page()
+    color_rgb = plan.color_rgb
+    layout = plan.layout
+    font, headings = layout['font'], layout['headings']
+    
+    # Elegant header
+    pdf.set_font(font, 'B', layout['name_size'])
+    pdf.set_text_color(*color_rgb)
+    pdf.cell(0, 12, data.get('name', ''), 0, 1, 'C')
+    
+    pdf.set_font(font, '', 10)
+    pdf.set_text_color(100, 100, 100)
+    if data.get('job_role'):
+        pdf.cell(0, 6, data['job_role'], 0, 1, 'C')
+    
+    contact = f"{data.get('email', '')} - {data.get('phone', '')} - {data.get('location', '')}"
+    pdf.cell(0, 6, contact, 0, 1, 'C')
+    
+    pdf.set_draw_color(*color_rgb)
+    pdf.set_line_width(layout['rule_width'])
+    pdf.line(20, pdf.get_y() + 3, 190, pdf.get_y() + 3)
+    pdf.ln(8)
+    
+    pdf.set_text_color(0, 0, 0)
+    
+    # Executive Summary
+    if data.get('summary'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['summary'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 6, data['summary'])
+        pdf.ln(4)
+    
+    # Professional Experience
+    if data.get('experience'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['experience'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for exp in data['experience']:
+            if exp.get('position'):
+                pdf.set_font(font, 'B', 12)
+                pdf.cell(120, 6, exp.get('position', ''), 0, 0)
+                pdf.set_font(font, '', 10)
+                pdf.cell(0, 6, exp.get('duration', ''), 0, 1, 'R')
+                pdf.set_font(font, 'I', 11)
+                pdf.cell(0, 6, exp.get('company', ''), 0, 1)
+                pdf.set_font(font, '', 10)
+                if exp.get('description'):
+                    for line in exp['description'].split('\n'):
+                        if line.strip():
+                            text_block(pdf, 0, 5, f"- {line.strip()}")
+                pdf.ln(3)
+    
+    # Education & Qualifications
+    if data.get('education'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['education'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        
+        for edu in data['education']:
+            if edu.get('degree'):
+                pdf.set_font(font, 'B', 11)
+                pdf.cell(0, 6, edu.get('degree', ''), 0, 1)
+                pdf.set_font(font, '', 10)
+                pdf.cell(120, 5, edu.get('institution', ''), 0, 0)
+                pdf.cell(0, 5, edu.get('year', ''), 0, 1, 'R')
+                pdf.ln(2)
+    
+    # Core Competencies
+    if data.get('skills'):
+        pdf.set_font(font, 'B', layout['heading_size'])
+        pdf.set_text_color(*color_rgb)
+        pdf.cell(0, 8, headings['skills'], 0, 1)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(font, '', 10)
+        text_block(pdf, 0, 6, data['skills'])
+    
+    return pdf
+
+# Builder name -> (builder, layout keys its template definition must provide).
+# Keys whose spec is a tuple of names hold a dict with exactly those entries.
+NUMBER = (int, float)
+COLOR = list
+SLOT = dict
+BUILDERS = {
+    "professional": (create_professional_resume, {
+        "font": str, "header_height": NUMBER, "name_size": NUMBER, "heading_size": NUMBER,
+        "headings": ("summary", "education", "experience", "projects", "skills"),
+    }),
+    "modern": (create_modern_resume, {
+        "font": str, "sidebar_width": NUMBER, "name_size": NUMBER, "heading_size": NUMBER,
+        "max_skills": int, "photo": SLOT, "headings": ("summary", "experience", "education", "skills"),
+    }),
+    "minimal": (create_minimal_resume, {
+        "font": str, "name_size": NUMBER, "heading_size": NUMBER, "rule_color": COLOR,
+        "headings": ("experience", "education", "projects", "skills"),
+    }),
+    "creative": (create_creative_resume, {
+        "font": str, "header_height": NUMBER, "name_size": NUMBER, "heading_size": NUMBER,
+        "column_width": NUMBER, "panel_color": COLOR, "max_experience": int, "max_bullets": int, "photo": SLOT,
+        "headings": ("summary", "skills", "experience", "education"),
+    }),
+    "executive": (create_executive_resume, {
+        "font": str, "name_size": NUMBER, "heading_size": NUMBER, "rule_width": NUMBER,
+        "headings": ("summary", "experience", "education", "skills"),
+    }),
+}
+
+def resume_digest(plan, data):
+    # The template version is part of the key, so editing a template invalidates
+    # every cached render made with the previous version
+    payload = json.dumps([plan.name, plan.version, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_resume(plan, data, pdf=None):
+    # Pass `pdf` to append the resume to an existing document instead of starting one
+    return BUILDERS[plan.builder][0](plan, data, pdf)
+
+def generate_resume(plan, data, deterministic=True):
+    pdf = build_resume(plan, data)
+    if deterministic:
+        pdf.make_deterministic(resume_digest(plan, data))
+    return pdf
+
+def render_pdf_bytes(plan, data):
+    pdf_bytes = generate_resume(plan, data).output(dest='S')
+    if isinstance(pdf_bytes, str):
+        return pdf_bytes.encode('latin-1', errors='ignore')
+    return bytes(pdf_bytes)
@@ -0,0 +1,520 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import chain, islice
+
+DEFAULT_PATH = os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'search.sqlite3')
+
+# Searchable fields; the numbers are what the postings table stores
+FIELDS = {"name": 1, "job_role": 2, "summary": 3, "skills": 4, "company": 5, "position": 6,
+          "institution": 7, "degree": 8, "technologies": 9, "experience": 10, "projects": 11}
+FIELD_ALIASES = {"role": "job_role", "title": "position", "school": "institution", "tech": "technologies"}
+FACETS = ("skills", "job_role", "company", "position", "institution", "technologies")
+# Facet values are indexed as postings too, under these field numbers, so filtering on
+# a facet is the same lookup as searching for a word
+FACET_FIELDS = {field: 100 + i for i, field in enumerate(FACETS)}
+# A prefix matching more distinct words than this is rejected instead of scanning them all
+MAX_EXPANSIONS = 512
+# Docs changed since a process last searched are replayed from the change log; one that
+# fell further behind than this reloads its facet values from scratch
+CHANGE_LOG_SIZE = 100000
+# Facet counts are exact up to this many hits; beyond it they are estimated from an even
+# sample of the hits, which keeps very broad queries as fast as ordinary ones
+FACET_SAMPLE = 10000
+# Postings are packed arrays of doc ids, one row per word, field and block of 2**BLOCK_BITS
+# consecutive doc ids: reading a word is a few blobs, and a save rewrites only small rows
+BLOCK_BITS = 12
+STOPWORDS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "with"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+_QUERY_RE = re.compile(r'\s*(\(|\)|-|(?:\w+:)?"[^"]*"|[^\s()"]+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    user TEXT UNIQUE NOT NULL,
+    name TEXT, job_role TEXT, updated REAL,
+    digest TEXT, postings TEXT, facets TEXT, data TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT, field INTEGER, block INTEGER, docs BLOB,
+    PRIMARY KEY (term, field, block)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS facet_counts (
+    field TEXT, value TEXT, label TEXT, count INTEGER,
+    PRIMARY KEY (field, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, doc_id INTEGER
+);
+"""
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(str(text or '').lower()) if t not in STOPWORDS]
+
+def _split_list(text):
+    return [part.strip() for part in re.split(r"[,\n;]", str(text or '')) if part.strip()]
+
+def extract(data):
+    # (terms, facets) for one resume: terms are (token, field number) pairs and
+    # facets are (field, normalised value, display label) triples
+    texts = [("name", data.get('name')), ("job_role", data.get('job_role')),
+             ("summary", data.get('summary')), ("skills", data.get('skills'))]
+    facets = [("job_role", data.get('job_role'))] + [("skills", s) for s in _split_list(data.get('skills'))]
+    for exp in data.get('experience') or []:
+        texts += [("company", exp.get('company')), ("position", exp.get('position')),
+                  ("experience", exp.get('description'))]
+        facets += [("company", exp.get('company')), ("position", exp.get('position'))]
+    for edu in data.get('education') or []:
+        texts += [("institution", edu.get('institution')), ("degree", edu.get('degree'))]
+        facets.append(("institution", edu.get('institution')))
+    for proj in data.get('projects') or []:
+        texts += [("projects", proj.get('title')), ("projects", proj.get('description')),
+                  ("technologies", proj.get('technologies'))]
+        facets += [("technologies", t) for t in _split_list(proj.get('technologies'))]
+    terms = {(token, FIELDS[field]) for field, text in texts for token in tokenize(text)}
+    labels = {}
+    for field, label in facets:
+        label = " ".join(str(label or '').split())
+        if label:
+            labels.setdefault((field, label.casefold()), label)
+    return terms, {(field, value, label) for (field, value), label in labels.items()}
+
+
+def _digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _unpack(blob):
+    docs = array('I')
+    docs.frombytes(blob)
+    if sys.byteorder == 'big':
+        docs.byteswap()  # Stored little-endian
+    return docs
+
+def _pack(docs):
+    if sys.byteorder == 'big':
+        docs = array('I', docs)
+        docs.byteswap()
+    return docs.tobytes()
+
+
+class QueryError(ValueError):
+    pass
+
+
+class SearchIndex:
+    # Incremental inverted index and facet counts over saved resumes, stored in SQLite.
+    # Re-indexing a resume only touches the postings and facet counts that changed.
+    # Each process also keeps every doc's facet values and update time in memory, loaded
+    # when the index opens and caught up from the change log before each search, so
+    # counting facets over the hits and ranking them never goes to disk.
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('RESUME_SEARCH_DB', DEFAULT_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._seq = None
+        self._doc_facets = {}  # doc_id -> tuple of value ids
+        self._updated = {}     # doc_id -> last indexed time
+        self._recent = []      # (updated, doc_id) oldest first; outdated entries are skipped
+        self._value_ids = {}   # (field, value) -> value id
+        self._values = []      # value id -> (field, value)
+        self._labels = []      # value id -> display label
+        with self._db() as db:
+            db.executescript(SCHEMA)
+        # Load up front rather than on the first search, which would hold the search lock meanwhile
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            self._load(db)
+        finally:
+            db.commit()
+
+    def _db(self):
+        # One connection per thread; SQLite serialises writers across threads and processes
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    # Indexing
+    def index_resume(self, user, data):
+        with self._db() as db:
+            changes = {}
+            self._index(db, user, data, _digest(data), changes)
+            self._write_postings(db, changes)
+
+    def index_many(self, items, batch=1000):
+        # Bulk load of (user, data) pairs: the posting changes of a whole batch are
+        # merged, so a common word's rows are rewritten once per batch, not once per resume
+        count = 0
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, batch))
+            if not chunk:
+                return count
+            with self._db() as db:
+                changes = {}
+                for user, data in chunk:
+                    self._index(db, user, data, _digest(data), changes)
+                self._write_postings(db, changes)
+            count += len(chunk)
+
+    def _index(self, db, user, data, digest, changes):
+        row = db.execute("SELECT doc_id, digest, postings, facets FROM docs WHERE user = ?", (user,)).fetchone()
+        if row and row[1] == digest:
+            return
+        terms, facets = extract(data)
+        keys = terms | {(value, FACET_FIELDS[field]) for field, value, _ in facets}
+        values = (data.get('name', ''), data.get('job_role', ''), time.time(), digest, json.dumps(sorted(keys)),
+                  json.dumps(sorted(facets)), json.dumps(data))
+        if row:
+            doc_id = row[0]
+            old_keys = {tuple(key) for key in json.loads(row[2])}
+            old_facets = {(field, value) for field, value, _ in json.loads(row[3])}
+            db.execute("UPDATE docs SET name = ?, job_role = ?, updated = ?, digest = ?, postings = ?, facets = ?, "
+                       "data = ? WHERE doc_id = ?", values + (doc_id,))
+        else:
+            doc_id = db.execute("INSERT INTO docs (name, job_role, updated, digest, postings, facets, data, user) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values + (user,)).lastrowid
+            old_keys, old_facets = set(), set()
+        self._stage(changes, doc_id, keys - old_keys, old_keys - keys)
+        self._count_facets(db, facets, old_facets)
+        self._log_change(db, doc_id)
+
+    def _stage(self, changes, doc_id, added, removed):
+        # changes: (term, field, block) -> {doc_id: present}; the last change to a doc wins
+        block = doc_id >> BLOCK_BITS
+        for term, field in added:
+            changes.setdefault((term, field, block), {})[doc_id] = True
+        for term, field in removed:
+            changes.setdefault((term, field, block), {})[doc_id] = False
+
+    def _write_postings(self, db, changes):
+        for (term, field, block), ops in sorted(changes.items()):
+            row = db.execute("SELECT docs FROM postings WHERE term = ? AND field = ? AND block = ?",
+                             (term, field, block)).fetchone()
+            docs = _unpack(row[0]) if row else array('I')
+            if row and not all(ops.values()):
+                docs = array('I', [doc_id for doc_id in docs if doc_id not in ops])
+            docs.extend(doc_id for doc_id, present in ops.items() if present)
+            if docs:
+                db.execute("INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?)", (term, field, block, _pack(docs)))
+            elif row:
+                db.execute("DELETE FROM postings WHERE term = ? AND field = ? AND block = ?", (term, field, block))
+
+    def _count_facets(self, db, facets, old):
+        new = {(field, value): label for field, value, label in facets}
+        removed = old - set(new)
+        db.executemany("UPDATE facet_counts SET count = count - 1 WHERE field = ? AND value = ?", removed)
+        db.executemany("DELETE FROM facet_counts WHERE field = ? AND value = ? AND count <= 0", removed)
+        db.executemany("INSERT INTO facet_counts VALUES (?, ?, ?, 1) "
+                       "ON CONFLICT (field, value) DO UPDATE SET count = count + 1",
+                       [(field, value, new[(field, value)]) for field, value in set(new) - old])
+
+    def _log_change(self, db, doc_id):
+        seq = db.execute("INSERT INTO changes (doc_id) VALUES (?)", (doc_id,)).lastrowid
+        if seq % 1000 == 0:
+            db.execute("DELETE FROM changes WHERE seq <= ?", (seq - CHANGE_LOG_SIZE,))
+
+    def remove(self, user):
+        with self._db() as db:
+            row = db.execute("SELECT doc_id, postings, facets FROM docs WHERE user = ?", (user,)).fetchone()
+            if row is None:
+                return
+            changes = {}
+            self._stage(changes, row[0], set(), {tuple(key) for key in json.loads(row[1])})
+            self._write_postings(db, changes)
+            self._count_facets(db, set(), {(field, value) for field, value, _ in json.loads(row[2])})
+            db.execute("DELETE FROM docs WHERE doc_id = ?", (row[0],))
+            self._log_change(db, row[0])
+
+    # In-memory doc values
+    def _value_id(self, field, value, label):
+        value_id = self._value_ids.get((field, value))
+        if value_id is None:
+            value_id = self._value_ids[(field, value)] = len(self._values)
+            self._values.append((field, value))
+            self._labels.append(label)
+        return value_id
+
+    def _facet_ids(self, facets):
+        return tuple(self._value_id(*facet) for facet in json.loads(facets))
+
+    def _load(self, db):
+        # Every doc's facet values and update time, read inside a transaction so they match
+        # the change log position recorded with them
+        self._seq = db.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+        self._doc_facets, self._updated = {}, {}
+        for doc_id, updated, facets in db.execute("SELECT doc_id, updated, facets FROM docs"):
+            self._updated[doc_id] = updated
+            self._doc_facets[doc_id] = self._facet_ids(facets)
+        self._recent = sorted((updated, doc_id) for doc_id, updated in self._updated.items())
+
+    def _sync(self):
+        # Called with self._lock held, inside the search's read transaction
+        db = self._db()
+        seq, oldest = db.execute("SELECT (SELECT MAX(seq) FROM changes), (SELECT MIN(seq) FROM changes)").fetchone()
+        if seq is None or seq == self._seq:
+            return
+        if oldest > self._seq + 1:
+            self._load(db)  # Fell behind the change log
+        else:
+            recent = []
+            for (doc_id,) in db.execute("SELECT DISTINCT doc_id FROM changes WHERE seq > ?", (self._seq,)).fetchall():
+                row = db.execute("SELECT updated, facets FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+                if row is None:
+                    self._updated.pop(doc_id, None)
+                    self._doc_facets.pop(doc_id, None)
+                else:
+                    self._updated[doc_id] = row[0]
+                    self._doc_facets[doc_id] = self._facet_ids(row[1])
+                    recent.append((row[0], doc_id))
+            self._recent += sorted(recent)
+            if len(self._recent) > 2 * len(self._updated) + 1000:
+                self._recent = sorted((updated, doc_id) for doc_id, updated in self._updated.items())
+            self._seq = seq
+
+    def _newest(self, docs, limit):
+        # Most recently updated hits. When hits are dense, walking the recency list finds
+        # them in a few steps; a handful of hits is cheaper to rank directly.
+        if docs is not None and len(docs) < len(self._updated) // 64:
+            return heapq.nlargest(limit, docs, key=self._updated.__getitem__)
+        top = []
+        for updated, doc_id in reversed(self._recent):
+            if len(top) == limit:
+                break
+            if (docs is None or doc_id in docs) and self._updated.get(doc_id) == updated:
+                top.append(doc_id)
+        return top
+
+    # Querying
+    def _term_docs(self, token, field=None, prefix=False):
+        db = self._db()
+        docs = set()
+        for term in (self._expand(token, field) if prefix else [token]):
+            if field is None:  # Any text field, but not the facet values
+                rows = db.execute("SELECT docs FROM postings WHERE term = ? AND field < 100", (term,))
+            else:
+                rows = db.execute("SELECT docs FROM postings WHERE term = ? AND field = ?", (term, field))
+            for (blob,) in rows:
+                docs.update(_unpack(blob))
+        return docs
+
+    def _expand(self, prefix, field=None):
+        # Distinct words starting with prefix, one index seek each rather than a scan
+        # over every row in the range: [prefix, prefix + max char) holds them all.
+        # Only words in the fields being searched count, so facet values never do for a bare prefix.
+        db = self._db()
+        upper = prefix + '\U0010ffff'
+        if field is None:
+            where, args = "field < 100", ()
+        else:
+            where, args = "field = ?", (field,)
+        terms = []
+        term = db.execute(f"SELECT MIN(term) FROM postings WHERE term >= ? AND term < ? AND {where}",
+                          (prefix, upper) + args).fetchone()[0]
+        while term is not None:
+            if len(terms) == MAX_EXPANSIONS:
+                raise QueryError(f"'{prefix}*' matches too many words. Please type more of the word.")
+            terms.append(term)
+            term = db.execute(f"SELECT MIN(term) FROM postings WHERE term > ? AND term < ? AND {where}",
+                              (term, upper) + args).fetchone()[0]
+        return terms
+
+    def _parse(self, query):
+        # query   := or ("OR" or)*        Terms: python, kube*, skills:python,
+        # or      := unary ("AND"? unary)*       company:"acme corp", -java, NOT java
+        # unary   := ("NOT" | "-") unary | "(" query ")" | term
+        tokens = _QUERY_RE.findall(query)
+        if "".join(tokens).replace(" ", "") != re.sub(r"\s+", "", query):
+            raise QueryError("Unbalanced quotes in query")
+        tokens = [t.upper() if t.upper() in ('AND', 'OR', 'NOT') else t for t in tokens]
+        pos = 0
+
+        def peek():
+            return tokens[pos] if pos < len(tokens) else None
+
+        def take():
+            nonlocal pos
+            pos += 1
+            return tokens[pos - 1]
+
+        def parse_or():
+            node = parse_and()
+            while peek() == 'OR':
+                take()
+                node = ('or', node, parse_and())
+            return node
+
+        def parse_and():
+            node = parse_unary()
+            while peek() not in (None, ')', 'OR'):
+                if peek() == 'AND':
+                    take()
+                node = ('and', node, parse_unary())
+            return node
+
+        def parse_unary():
+            token = peek()
+            if token is None:
+                raise QueryError("Query ends unexpectedly")
+            if token in ('NOT', '-'):
+                take()
+                return ('not', parse_unary())
+            if token == '(':
+                take()
+                node = parse_or()
+                if peek() != ')':
+                    raise QueryError("Missing closing parenthesis")
+                take()
+                return node
+            if token == ')':
+                raise QueryError("Unexpected closing parenthesis")
+            return self._term_node(take())
+
+        node = parse_or()
+        if peek() is not None:
+            raise QueryError(f"Unexpected '{peek()}'")
+        return node
+
+    def _term_node(self, token):
+        field = None
+        match = re.match(r"^(\w+):(.+)$", token)
+        if match and (match.group(1).lower() in FIELDS or match.group(1).lower() in FIELD_ALIASES):
+            name = match.group(1).lower()
+            field = FIELDS[FIELD_ALIASES.get(name, name)]
+            token = match.group(2)
+        prefix = token.endswith('*') and not token.startswith('"')
+        words = tokenize(token.strip('"').rstrip('*'))
+        if not words:
+            raise QueryError(f"Nothing to search for in '{token}'")
+        # A quoted or multi-word term needs every word, within the same field if one was given
+        return ('terms', [(w, field, prefix and i == len(words) - 1) for i, w in enumerate(words)])
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == 'terms':
+            docs = None
+            for word, field, prefix in node[1]:
+                found = self._term_docs(word, field, prefix)
+                docs = found if docs is None else docs & found
+                if not docs:
+                    break
+            return docs
+        if kind == 'or':
+            return self._evaluate(node[1]) | self._evaluate(node[2])
+        if kind == 'and':
+            # Subtract negated operands instead of materialising their complement
+            left, right = node[1], node[2]
+            if right[0] == 'not' and left[0] != 'not':
+                return self._evaluate(left) - self._evaluate(right[1])
+            if left[0] == 'not' and right[0] != 'not':
+                return self._evaluate(right) - self._evaluate(left[1])
+            return self._evaluate(left) & self._evaluate(right)
+        if kind == 'not':
+            return set(self._updated) - self._evaluate(node[1])
+
+    def search(self, query='', filters=None, limit=50, facet_limit=15):
+        # `filters` maps a facet field to accepted values: OR within a field, AND across fields.
+        # Returns total hits, the most recently updated matches and facet counts for the hits.
+        started = time.perf_counter()
+        node = self._parse(query) if query.strip() else None
+        db = self._db()
+        with self._lock:
+            # One snapshot for catching up and for reading postings, so every hit is known in memory
+            db.execute("BEGIN")
+            try:
+                self._sync()
+                docs = self._evaluate(node) if node else None
+                for field, values in (filters or {}).items():
+                    if values:
+                        found = set().union(*(self._term_docs(str(v).casefold(), FACET_FIELDS[field]) for v in values))
+                        docs = found if docs is None else docs & found
+                top = self._newest(docs, limit)
+                if docs is None:
+                    total = len(self._updated)
+                    facets, estimated = self._global_facets(facet_limit), False
+                else:
+                    total = len(docs)
+                    facets, estimated = self._hit_facets(docs, facet_limit), total > FACET_SAMPLE
+                rows = {row[0]: row for row in db.execute(
+                    "SELECT doc_id, user, name, job_role, updated FROM docs "
+                    "WHERE doc_id IN (SELECT value FROM json_each(?))", (json.dumps(top),))}
+            finally:
+                db.commit()
+        return {
+            "total": total,
+            "results": [{"doc_id": r[0], "user": r[1], "name": r[2], "job_role": r[3], "updated": r[4]}
+                        for r in map(rows.get, top) if r],
+            "facets": facets,
+            "facets_estimated": estimated,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def _global_facets(self, limit):
+        db = self._db()
+        return {field: [(label, value, count) for value, label, count in db.execute(
+                    "SELECT value, label, count FROM facet_counts WHERE field = ? "
+                    "ORDER BY count DESC, value LIMIT ?", (field, limit))]
+                for field in FACETS}
+
+    def _hit_facets(self, docs, limit):
+        sample = list(islice(docs, 0, None, max(1, -(-len(docs) // FACET_SAMPLE))))
+        scale = len(docs) / len(sample) if sample else 1
+        counts = Counter(chain.from_iterable(map(self._doc_facets.__getitem__, sample)))
+        facets = {field: [] for field in FACETS}
+        for value_id, count in counts.most_common():
+            field, value = self._values[value_id]
+            if len(facets[field]) < limit:
+                facets[field].append((self._labels[value_id], value, round(count * scale)))
+        return facets
+
+    def documents(self, doc_ids):
+        # Stored resume data for the given hits, e.g. to build a recruiter packet
+        db = self._db()
+        for doc_id in doc_ids:
+            row = db.execute("SELECT data FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row:
+                yield json.loads(row[0])
+
+    def stats(self):
+        db = self._db()
+        return {"documents": db.execute("SELECT COUNT(*) FROM docs").fetchone()[0],
+                "facet_values": db.execute("SELECT COUNT(*) FROM facet_counts").fetchone()[0],
+                "bytes": os.path.getsize(self.path)}
+
+
+if __name__ == '__main__':
+    # python search_index.py rebuild      index the latest saved version of every resume
+    # python search_index.py query "..."  run a query from the command line
+    if len(sys.argv) < 2 or sys.argv[1] not in ('rebuild', 'query'):
+        print('Usage: python search_index.py rebuild | query "python AND skills:aws*"')
+        sys.exit(1)
+    index = SearchIndex()
+    if sys.argv[1] == 'rebuild':
+        from history import VersionStore
+        store = VersionStore()
+        count = index.index_many((user, store.get(user)) for user in store.users())
+        print(f"Indexed {count} resumes: {index.stats()}")
+    else:
+        try:
+            result = index.search(" ".join(sys.argv[2:]))
+        except QueryError as e:
+            print(e)
+            sys.exit(1)
+        print(f"{result['total']} matches in {result['seconds'] * 1000:.1f} ms")
+        for hit in result["results"]:
+            print(f"  {hit['name']} - {hit['job_role']}")
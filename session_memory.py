@@ -0,0 +1,198 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+
+MB = 1024 * 1024
+
+
+def approx_size(obj):
+    # Rough deep size of the plain data we keep per session (dicts, lists, strings, bytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approx_size(item) for item in obj)
+    return size
+
+
+class _Entry:
+    def __init__(self, value, size, evictable):
+        self.value = value
+        self.size = size
+        self.evictable = evictable
+        self.spill_path = None
+        self.is_text = isinstance(value, str)
+        self.last_used = time.monotonic()
+
+
+class _Session:
+    def __init__(self):
+        self.entries = {}
+        self.last_seen = time.monotonic()
+
+    def resident_bytes(self):
+        # Only what the governor can release: artifacts it holds that are not spilled
+        return sum(e.size for e in self.entries.values() if e.evictable and e.spill_path is None)
+
+    def accounted_bytes(self):
+        # Data owned elsewhere (session_state), reported but never freed by the governor
+        return sum(e.size for e in self.entries.values() if not e.evictable)
+
+
+class MemoryGovernor:
+    # Accounts approximate bytes held per session and enforces a per-session cap and a
+    # process-wide budget on the artifacts it holds. Evictable artifacts (rendered PDFs,
+    # preview HTML) are spilled to disk under pressure, least recently used and idle
+    # sessions first; sessions idle longer than `idle_timeout` lose everything they hold.
+    # Accounted data it doesn't own is reported separately and never counts as pressure.
+    def __init__(self, session_cap=None, process_budget=None, idle_timeout=None, spill_dir=None):
+        self.session_cap = session_cap or int(float(os.environ.get('RESUME_SESSION_MEMORY_CAP_MB', 20)) * MB)
+        self.process_budget = process_budget or int(float(os.environ.get('RESUME_PROCESS_MEMORY_BUDGET_MB', 512)) * MB)
+        self.idle_timeout = idle_timeout or float(os.environ.get('RESUME_SESSION_IDLE_TIMEOUT', 1800))
+        self.spill_dir = spill_dir or os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'spill')
+        self._sessions = {}
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+        self.counters = {"evictions": 0, "spills": 0, "spill_reloads": 0,
+                         "idle_session_evictions": 0, "idle_bytes_reclaimed": 0}
+
+    def _session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        session.last_seen = time.monotonic()
+        return session
+
+    def touch(self, session_id):
+        with self._lock:
+            self._session(session_id)
+            if time.monotonic() - self._last_sweep > min(60.0, self.idle_timeout / 4):
+                self.sweep()
+
+    def account(self, session_id, key, obj):
+        # Track data we don't own (e.g. user_data) so it counts against the budgets
+        with self._lock:
+            self._drop_entry(self._session(session_id), key)
+            self._session(session_id).entries[key] = _Entry(None, approx_size(obj), evictable=False)
+            self._enforce(session_id)
+
+    def put(self, session_id, key, value):
+        with self._lock:
+            session = self._session(session_id)
+            self._drop_entry(session, key)
+            session.entries[key] = _Entry(value, approx_size(value), evictable=True)
+            self._enforce(session_id)
+
+    def get(self, session_id, key):
+        with self._lock:
+            entry = self._session(session_id).entries.get(key)
+            if entry is None or not entry.evictable:
+                return None
+            entry.last_used = time.monotonic()
+            if entry.spill_path is not None:
+                try:
+                    with open(entry.spill_path, 'rb') as f:
+                        raw = f.read()
+                except OSError:
+                    del self._sessions[session_id].entries[key]
+                    return None
+                os.remove(entry.spill_path)
+                entry.spill_path = None
+                entry.value = raw.decode('utf-8') if entry.is_text else raw
+                self.counters["spill_reloads"] += 1
+                value = entry.value
+                self._enforce(session_id)
+                return value
+            return entry.value
+
+    def drop_session(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                for key in list(session.entries):
+                    self._drop_entry(session, key)
+
+    def sweep(self):
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            cutoff = self._last_sweep - self.idle_timeout
+            for session_id, session in list(self._sessions.items()):
+                if session.last_seen < cutoff:
+                    self.counters["idle_session_evictions"] += 1
+                    self.counters["idle_bytes_reclaimed"] += session.resident_bytes()
+                    self.drop_session(session_id)
+
+    def _drop_entry(self, session, key):
+        entry = session.entries.pop(key, None)
+        if entry is not None and entry.spill_path is not None:
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+
+    def _spill(self, session_id, key, entry):
+        if isinstance(entry.value, (bytes, bytearray, str)):
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = hashlib.sha256(f"{session_id}:{key}".encode('utf-8')).hexdigest()
+            path = os.path.join(self.spill_dir, name)
+            with open(path, 'wb') as f:
+                f.write(entry.value.encode('utf-8') if entry.is_text else entry.value)
+            entry.spill_path = path
+            entry.value = None
+            self.counters["spills"] += 1
+        else:
+            del self._sessions[session_id].entries[key]
+        self.counters["evictions"] += 1
+
+    def _resident(self):
+        return sum(s.resident_bytes() for s in self._sessions.values())
+
+    def _candidates(self, session_ids):
+        # Idle sessions first, then least recently used artifacts
+        return sorted(
+            ((self._sessions[sid].last_seen, entry.last_used, sid, key, entry)
+             for sid in session_ids for key, entry in self._sessions[sid].entries.items()
+             if entry.evictable and entry.spill_path is None),
+            key=lambda c: (c[0], c[1]),
+        )
+
+    def _enforce(self, session_id):
+        session = self._sessions[session_id]
+        excess = session.resident_bytes() - self.session_cap
+        for _, _, sid, key, entry in self._candidates([session_id]):
+            if excess <= 0:
+                break
+            excess -= entry.size
+            self._spill(sid, key, entry)
+        excess = self._resident() - self.process_budget
+        if excess > 0:
+            self.sweep()
+            excess = self._resident() - self.process_budget
+        for _, _, sid, key, entry in self._candidates(list(self._sessions)):
+            if excess <= 0:
+                break
+            excess -= entry.size
+            self._spill(sid, key, entry)
+
+    def session_bytes(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.resident_bytes() if session else 0
+
+    def session_accounted_bytes(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.accounted_bytes() if session else 0
+
+    def metrics(self):
+        with self._lock:
+            spilled = sum(e.size for s in self._sessions.values() for e in s.entries.values()
+                          if e.spill_path is not None)
+            accounted = sum(s.accounted_bytes() for s in self._sessions.values())
+            metrics = {"sessions": len(self._sessions), "resident_bytes": self._resident(),
+                       "accounted_bytes": accounted, "spilled_bytes": spilled, "session_cap": self.session_cap,
+                       "process_budget": self.process_budget}
+            metrics.update(self.counters)
+            return metrics
@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join(os.environ.get('RESUME_DATA_DIR', '.resume_data'), 'bullet_index')
+
+# Starter library used when no prebuilt index is on disk
+SEED_BULLETS = [
+    "Led a cross-functional team of 8 engineers to deliver a customer portal two weeks ahead of schedule",
+    "Reduced monthly cloud infrastructure costs by 30% by rightsizing instances and adding autoscaling",
+    "Built automated reporting dashboards in Python and SQL, saving 10 hours of manual work per week",
+    "Increased quarterly sales by 25% by redesigning the lead qualification process",
+    "Managed a portfolio of 40 key accounts worth $2M in annual recurring revenue",
+    "Designed and launched an onboarding program that cut new hire ramp-up time by 40%",
+    "Improved application response time by 60% by profiling and optimizing database queries",
+    "Mentored 5 junior developers through code reviews and weekly pairing sessions",
+    "Streamlined inventory tracking, reducing stock discrepancies by 35%",
+    "Implemented a CI/CD pipeline that shortened release cycles from monthly to weekly",
+    "Resolved an average of 50 customer support tickets per day with a 98% satisfaction rating",
+    "Coordinated logistics for 12 corporate events with budgets of up to $150K",
+    "Developed a machine learning model that improved demand forecast accuracy by 18%",
+    "Negotiated vendor contracts that saved the company $200K annually",
+    "Authored technical documentation that reduced support escalations by 20%",
+    "Migrated legacy services to a microservices architecture with zero downtime",
+    "Conducted user research with 30 participants to guide a product redesign",
+    "Grew social media engagement by 150% through a data-driven content calendar",
+    "Prepared monthly financial statements and variance analyses for senior leadership",
+    "Trained 20 staff members on new safety procedures, achieving zero incidents for 18 months",
+    "Automated data validation checks, cutting reporting errors by 90%",
+    "Drove adoption of agile practices across 3 teams, improving sprint predictability by 30%",
+    "Created a reusable component library that accelerated front-end development by 25%",
+    "Analyzed customer churn data to identify retention levers, reducing churn by 12%",
+    "Led the migration of 200+ users to a new CRM platform with minimal disruption",
+    "Optimized supply chain routes, decreasing delivery times by 15%",
+    "Wrote and maintained unit and integration tests, raising code coverage from 45% to 85%",
+    "Presented quarterly business reviews to C-level stakeholders",
+    "Managed end-to-end recruitment for 25 roles, reducing time-to-hire by 20%",
+    "Designed a REST API used by 4 internal teams and 10K daily active users",
+]
+
+
+# Embeddings
+_TOKEN_RE = re.compile(r"[a-z0-9$%+#.]+")
+
+def _features(text):
+    words = _TOKEN_RE.findall(text.lower())
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"^{word}$"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return features
+
+def embed(texts, dim=EMBEDDING_DIM):
+    # Signed feature hashing: deterministic across processes and needs no model files
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode('utf-8'))
+            vectors[row, h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _quantize(vectors):
+    scales = np.abs(vectors).max(axis=1)
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None] * 127.0).astype(np.int8)
+    return codes, (scales / 127.0).astype(np.float32)
+
+def _kmeans(sample, n_lists, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assignment == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+    return centroids
+
+
+# Index
+class BulletIndex:
+    # Inverted-file index: vectors are partitioned by k-means centroid and stored as
+    # int8 codes, so a query only scans the `nprobe` closest partitions. Candidates are
+    # re-ranked with exact cosine similarity on re-embedded text.
+    def __init__(self, centroids, list_offsets, codes, scales, text_offsets, text_blob, dim=EMBEDDING_DIM):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.codes = codes
+        self.scales = scales
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob
+        self.dim = dim
+
+    def __len__(self):
+        return len(self.scales)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported bullet index version: {meta.get('version')}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                  for name in ('centroids', 'list_offsets', 'codes', 'scales', 'text_offsets')}
+        text_blob = np.memmap(os.path.join(path, 'texts.bin'), dtype=np.uint8, mode='r')
+        return cls(np.asarray(arrays['centroids']), np.asarray(arrays['list_offsets']), arrays['codes'],
+                   arrays['scales'], arrays['text_offsets'], text_blob, dim=meta['dim'])
+
+    @classmethod
+    def build(cls, texts, path=None, n_lists=None, chunk_size=50000, sample_size=100000, dim=EMBEDDING_DIM):
+        texts = [t.strip() for t in texts if t.strip()]
+        n = len(texts)
+        if n == 0:
+            raise ValueError("Cannot build a bullet index from an empty library")
+        n_lists = n_lists or max(1, min(4096, int(np.sqrt(n))))
+        rng = np.random.default_rng(0)
+        sample_ids = rng.choice(n, min(n, sample_size), replace=False)
+        centroids = _kmeans(embed([texts[i] for i in sample_ids], dim), n_lists)
+
+        # Embed, assign and quantize in chunks so memory stays bounded for large libraries
+        assignment = np.empty(n, dtype=np.int32)
+        codes = np.empty((n, dim), dtype=np.int8)
+        scales = np.empty(n, dtype=np.float32)
+        for start in range(0, n, chunk_size):
+            vectors = embed(texts[start:start + chunk_size], dim)
+            assignment[start:start + len(vectors)] = np.argmax(vectors @ centroids.T, axis=1)
+            codes[start:start + len(vectors)], scales[start:start + len(vectors)] = _quantize(vectors)
+
+        order = np.argsort(assignment, kind='stable')
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+        encoded = [texts[i].encode('utf-8') for i in order]
+        text_offsets = np.zeros(n + 1, dtype=np.int64)
+        text_offsets[1:] = np.cumsum([len(b) for b in encoded])
+        text_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        index = cls(centroids, list_offsets, codes[order], scales[order], text_offsets, text_blob, dim=dim)
+        if path:
+            index.save(path)
+            return cls.load(path)
+        return index
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ('centroids', 'list_offsets', 'codes', 'scales', 'text_offsets'):
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(path, 'texts.bin'), 'wb') as f:
+            f.write(np.asarray(self.text_blob).tobytes())
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({"version": INDEX_VERSION, "dim": self.dim, "count": len(self),
+                       "lists": len(self.centroids)}, f)
+
+    def text(self, i):
+        return bytes(self.text_blob[self.text_offsets[i]:self.text_offsets[i + 1]]).decode('utf-8')
+
+    def search(self, query, k=5, nprobe=8, rerank=4):
+        query_vec = embed([query], self.dim)[0]
+        if not query_vec.any():
+            return []
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query_vec), nprobe - 1)[:nprobe]
+        candidates, scores = [], []
+        for c in lists:
+            start, end = int(self.list_offsets[c]), int(self.list_offsets[c + 1])
+            if start == end:
+                continue
+            block = np.asarray(self.codes[start:end], dtype=np.float32) @ query_vec
+            scores.append(block * self.scales[start:end])
+            candidates.append(np.arange(start, end))
+        if not candidates:
+            return []
+        candidates, scores = np.concatenate(candidates), np.concatenate(scores)
+        top = min(len(scores), k * rerank)
+        best = candidates[np.argpartition(-scores, top - 1)[:top]]
+        texts = [self.text(i) for i in best]
+        exact = embed(texts, self.dim) @ query_vec
+        ranked = np.argsort(-exact)[:k]
+        return [(texts[i], float(exact[i])) for i in ranked]
+
+
+def find_near_duplicates(bullets, threshold=0.75):
+    # Pairs of the user's own bullets that say nearly the same thing
+    bullets = [b.strip() for b in bullets if b.strip()]
+    if len(bullets) < 2:
+        return []
+    vectors = embed(bullets)
+    similarity = np.triu(vectors @ vectors.T, k=1)
+    rows, cols = np.nonzero(similarity >= threshold)
+    return [(bullets[i], bullets[j], float(similarity[i, j])) for i, j in zip(rows, cols)]
+
+
+def load_default_index(path=None):
+    path = path or os.environ.get('RESUME_BULLET_INDEX', DEFAULT_INDEX_DIR)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return BulletIndex.load(path)
+    return BulletIndex.build(SEED_BULLETS)
+
+
+if __name__ == '__main__':
+    # python suggestions.py build library.txt [index_dir]
+    if len(sys.argv) < 3 or sys.argv[1] != 'build':
+        print("Usage: python suggestions.py build <library.txt> [index_dir]")
+        sys.exit(1)
+    with open(sys.argv[2], encoding='utf-8') as f:
+        library = f.read().splitlines()
+    out_dir = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_INDEX_DIR
+    built = BulletIndex.build(library, out_dir)
+    print(f"Indexed {len(built)} bullets into {out_dir}")
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from rendering import BUILDERS, CORE_FONTS
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+_COLOR_RE = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+
+class TemplatePlan:
+    # A compiled template: its validated definition plus values precomputed once. Plans
+    # are never modified; an edited file compiles into a new plan with a new version, so
+    # a render that started with the old plan finishes on the old template.
+    def __init__(self, definition, version, source):
+        self.name = definition["name"]
+        self.description = definition.get("description", "")
+        self.color = definition["color"]
+        self.color_rgb = tuple(int(self.color[i:i + 2], 16) for i in (1, 3, 5))
+        self.builder = definition["builder"]
+        self.layout = definition["layout"]
+        self.order = definition.get("order", 0)
+        self.version = version
+        self.source = source
+
+
+def _check_layout(layout, spec):
+    if not isinstance(layout, dict):
+        raise ValueError("'layout' must be an object")
+    missing = [key for key in spec if key not in layout]
+    unknown = [key for key in layout if key not in spec]
+    if missing or unknown:
+        raise ValueError(f"Layout keys missing: {missing or 'none'}; unknown: {unknown or 'none'}")
+    for key, kind in spec.items():
+        value = layout[key]
+        if isinstance(kind, tuple) and all(isinstance(k, str) for k in kind):
+            if not isinstance(value, dict) or sorted(value) != sorted(kind) \
+                    or not all(isinstance(v, str) for v in value.values()):
+                raise ValueError(f"Layout '{key}' must map exactly {', '.join(kind)} to text")
+        elif kind is dict:
+            if not (isinstance(value, dict) and sorted(value) == ['h', 'w', 'x', 'y']
+                    and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value.values())
+                    and value['w'] > 0 and value['h'] > 0):
+                raise ValueError(f"Layout '{key}' must be a slot with x, y, w and h in mm")
+        elif kind is list:
+            if not (isinstance(value, list) and len(value) == 3
+                    and all(isinstance(v, int) and 0 <= v <= 255 for v in value)):
+                raise ValueError(f"Layout '{key}' must be an [r, g, b] list")
+        elif not isinstance(value, kind) or isinstance(value, bool):
+            raise ValueError(f"Layout '{key}' has the wrong type")
+    if layout.get("font") not in CORE_FONTS:
+        raise ValueError(f"Font must be one of: {', '.join(CORE_FONTS)}")
+
+def compile_template(definition, source=''):
+    if not isinstance(definition, dict):
+        raise ValueError("A template definition must be a JSON object")
+    for key in ("name", "color", "builder", "layout"):
+        if key not in definition:
+            raise ValueError(f"Missing '{key}'")
+    if not _COLOR_RE.match(str(definition["color"])):
+        raise ValueError("'color' must look like #RRGGBB")
+    if definition["builder"] not in BUILDERS:
+        raise ValueError(f"Unknown builder '{definition['builder']}'. Available: {', '.join(BUILDERS)}")
+    _check_layout(definition["layout"], BUILDERS[definition["builder"]][1])
+    canonical = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+    return TemplatePlan(definition, hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12], source)
+
+
+class TemplateRegistry:
+    # Compiled plans for every templates/*.json file. The directory is re-checked at most
+    # once per `poll_interval` and only files whose mtime or size changed are recompiled.
+    # A file that fails to load keeps serving its last good plan and reports the error.
+    def __init__(self, directory=None, poll_interval=None):
+        self.directory = directory or os.environ.get('RESUME_TEMPLATE_DIR', TEMPLATE_DIR)
+        self.poll_interval = poll_interval if poll_interval is not None else \
+            float(os.environ.get('RESUME_TEMPLATE_POLL_SECONDS', 2))
+        self.generation = 0
+        self.errors = {}
+        self._load_errors = {}
+        self._files = {}
+        self._plans = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                names = sorted(n for n in os.listdir(self.directory) if n.endswith('.json'))
+            except OSError:
+                names = []
+            files, load_errors = {}, {}
+            changed = False
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stamp = (st.st_mtime_ns, st.st_size)
+                known = self._files.get(path)
+                previous = known[1] if known else None
+                if known and known[0] == stamp:
+                    files[path] = known
+                    if path in self._load_errors:
+                        load_errors[path] = self._load_errors[path]
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        plan = compile_template(json.load(f), path)
+                except (OSError, ValueError) as e:
+                    load_errors[path] = str(e)
+                    plan = previous
+                files[path] = (stamp, plan)
+                changed = changed or plan is not previous
+            changed = changed or set(files) != set(self._files)
+            self._files, self._load_errors = files, load_errors
+            if changed:
+                plans = {}
+                for plan in sorted((p for _, p in files.values() if p), key=lambda p: (p.order, p.source)):
+                    if plan.name not in plans:
+                        plans[plan.name] = plan
+                self._plans = plans
+                self.generation += 1
+            self.errors = dict(load_errors)
+            for _, plan in files.values():
+                if plan and self._plans.get(plan.name) is not plan:
+                    self.errors[plan.source] = f"Template name '{plan.name}' is already used by " \
+                                               f"{self._plans[plan.name].source}"
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at >= self.poll_interval:
+            self.refresh()
+
+    def plans(self):
+        # Snapshot of every current plan, by name, in display order
+        self._maybe_refresh()
+        return dict(self._plans)
+
+    def get(self, name):
+        self._maybe_refresh()
+        plan = self._plans.get(name)
+        if plan is None:
+            raise KeyError(f"Unknown template '{name}'. Available: {', '.join(self._plans)}")
+        return plan
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from admission import DEFAULT_TENANT, AdmissionController, Overloaded, TokenBucket
+
+UNLIMITED = {"rate": 1000, "burst": 1000}
+
+
+def _controller(**kwargs):
+    kwargs.setdefault("quotas", {DEFAULT_TENANT: {"interactive": UNLIMITED, "batch": UNLIMITED}})
+    kwargs.setdefault("tenant_keys", {})
+    return AdmissionController(**kwargs)
+
+
+def _hold(controller, lane, release, started, tenant=DEFAULT_TENANT):
+    def run():
+        with controller.admit(tenant, lane):
+            started.release()
+            release.wait()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_batch_work_cannot_take_every_slot():
+    controller = _controller(max_concurrent=4, max_wait={"interactive": 0.5, "batch": 0.2})
+    release, started = threading.Event(), threading.Semaphore(0)
+    threads = [_hold(controller, "batch", release, started) for _ in range(3)]
+    for _ in threads:
+        assert started.acquire(timeout=2)
+    # The fourth batch job waits for a batch slot and times out ...
+    with pytest.raises(Overloaded, match="Timed out"):
+        with controller.admit(DEFAULT_TENANT, "batch"):
+            pass
+    # ... while a preview still gets the reserved slot at once
+    began = time.monotonic()
+    with controller.admit(DEFAULT_TENANT, "interactive"):
+        assert time.monotonic() - began < 0.2
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert controller.metrics()["in_flight"] == 0
+
+
+def test_service_time_is_tracked_per_lane():
+    controller = _controller(max_concurrent=2)
+    with controller.admit(DEFAULT_TENANT, "batch"):
+        time.sleep(0.8)
+    # Long batch jobs raise the batch estimate only; previews keep their own
+    service = controller.metrics()["service_time"]
+    assert service["batch"] > 0.5 and service["interactive"] == 0.5
+
+
+def test_interactive_waits_by_priority():
+    controller = _controller(max_concurrent=1, lane_limits={"interactive": 1, "batch": 1})
+    order = []
+    release, started = threading.Event(), threading.Semaphore(0)
+    holder = _hold(controller, "interactive", release, started)
+    assert started.acquire(timeout=2)
+
+    def run(lane):
+        with controller.admit(DEFAULT_TENANT, lane):
+            order.append(lane)
+    waiters = [threading.Thread(target=run, args=("batch",)), threading.Thread(target=run, args=("interactive",))]
+    for waiter in waiters:
+        waiter.start()
+        time.sleep(0.05)
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join()
+    assert order == ["interactive", "batch"]
+
+
+def test_shed_requests_keep_their_quota():
+    controller = _controller(max_concurrent=1, max_queue={"interactive": 0, "batch": 0},
+                             quotas={DEFAULT_TENANT: {"interactive": {"rate": 0.001, "burst": 2}}})
+    for _ in range(5):
+        with pytest.raises(Overloaded, match="queue is full"):
+            with controller.admit(DEFAULT_TENANT, "interactive"):
+                pass
+    assert controller._bucket(DEFAULT_TENANT, "interactive").tokens == 2
+
+
+def test_quota_is_per_tenant_and_unknown_tenants_share_the_default():
+    quota = {"interactive": {"rate": 0.001, "burst": 1}}
+    controller = _controller(quotas={"acme": quota, DEFAULT_TENANT: quota}, tenant_keys={"k3y": "acme"})
+    assert controller.tenant_for_key("k3y") == "acme"
+    assert controller.tenant_for_key("wrong") == controller.tenant_for_key(None) == DEFAULT_TENANT
+    with controller.admit("acme"):
+        pass
+    with pytest.raises(Overloaded, match="quota") as shed:
+        with controller.admit("acme"):
+            pass
+    assert shed.value.retry_after > 100
+    with controller.admit("made-up"):
+        pass
+    with pytest.raises(Overloaded, match="quota"):
+        with controller.admit("also-made-up"):
+            pass
+    assert controller.metrics()["lanes"]["interactive"]["shed"] == {"quota": 2}
+
+
+def test_costly_requests_need_a_full_bucket_and_leave_debt():
+    bucket = TokenBucket(rate=10, burst=5)
+    assert bucket.take(20) == 0
+    assert bucket.tokens == pytest.approx(-15, abs=0.1)
+    assert bucket.take(1) == pytest.approx(1.6, abs=0.05)
+
+
+def test_unknown_lane():
+    with pytest.raises(ValueError, match="Unknown lane"):
+        with _controller().admit(DEFAULT_TENANT, "bulk"):
+            pass
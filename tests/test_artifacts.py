@@ -0,0 +1,131 @@
+import http.client
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import pytest
+
+from artifacts import ArtifactStore, make_server
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(root=str(tmp_path / "artifacts"), secret=b"test-secret")
+
+
+@pytest.fixture
+def server(store):
+    server = make_server(store, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, url, method="GET", **headers):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        parsed = urlparse(url)
+        conn.request(method, f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path, headers=headers)
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def _link(store, server, ttl=None):
+    digest = store.put(DATA, "Ann Lee résumé.pdf")
+    return digest, store.link(digest, "http://%s:%d/" % server.server_address, ttl)
+
+
+def test_put_is_content_addressed(store):
+    digest = store.put(DATA, "a.pdf")
+    assert store.put(DATA, "b.pdf") == digest
+    assert store.meta(digest)["filename"] == "b.pdf"
+    with store.open(digest) as f:
+        assert f.read() == DATA
+    staged = store.staging_path()
+    with open(staged, "wb") as f:
+        f.write(DATA)
+    assert store.put_file(staged, "c.pdf") == digest
+    assert not os.path.exists(staged)
+    assert store.meta("../" + digest) is None
+
+
+def test_expired_artifacts_are_purged(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), ttl=0.1, secret=b"s")
+    digest = store.put(DATA, "a.pdf")
+    time.sleep(0.2)
+    assert not store.exists(digest)
+    assert store.purge_expired() == 1
+    assert not list(tmp_path.rglob(digest + "*"))
+
+
+def test_download_with_valid_link(store, server):
+    digest, url = _link(store, server)
+    status, headers, body = _get(server, url)
+    assert status == 200 and body == DATA
+    assert headers["ETag"] == f'"{digest}"'
+    assert headers["Content-Length"] == str(len(DATA))
+    assert headers["Content-Disposition"] == "attachment; filename*=UTF-8''Ann%20Lee%20r%C3%A9sum%C3%A9.pdf"
+    status, headers, body = _get(server, url, method="HEAD")
+    assert status == 200 and body == b"" and headers["Content-Length"] == str(len(DATA))
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda url: url.replace("sig=", "sig=0"),
+    lambda url: url.replace("exp=", "exp=9"),
+    lambda url: url.split("?")[0],
+])
+def test_tampered_links_are_forbidden(store, server, tamper):
+    _, url = _link(store, server)
+    assert _get(server, tamper(url))[0] == 403
+
+
+def test_expired_link_is_gone(store, server):
+    digest = store.put(DATA, "a.pdf")
+    expires = int(time.time()) - 10
+    url = f"/a/{digest}?exp={expires}&sig={store._signature(digest, expires)}"
+    assert _get(server, url)[0] == 410
+
+
+def test_unknown_artifact_and_bad_paths_are_not_found(store, server):
+    digest = "0" * 64
+    url = store.link(digest, "")
+    assert _get(server, url)[0] == 404
+    assert _get(server, "/a/not-a-digest")[0] == 404
+
+
+def test_matching_etag_is_not_modified(store, server):
+    digest, url = _link(store, server)
+    status, headers, body = _get(server, url, **{"If-None-Match": f'"other", "{digest}"'})
+    assert status == 304 and body == b"" and headers["ETag"] == f'"{digest}"'
+    assert _get(server, url, **{"If-None-Match": '"other"'})[0] == 200
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=100-", 100, len(DATA) - 1),
+    ("bytes=-50", len(DATA) - 50, len(DATA) - 1),
+    ("bytes=10000-999999", 10000, len(DATA) - 1),
+])
+def test_ranges(store, server, range_header, start, end):
+    _, url = _link(store, server)
+    status, headers, body = _get(server, url, Range=range_header)
+    assert status == 206
+    assert headers["Content-Range"] == f"bytes {start}-{end}/{len(DATA)}"
+    assert body == DATA[start:end + 1]
+
+
+def test_unsatisfiable_and_malformed_ranges(store, server):
+    digest, url = _link(store, server)
+    status, headers, _ = _get(server, url, Range=f"bytes={len(DATA)}-")
+    assert status == 416 and headers["Content-Range"] == f"bytes */{len(DATA)}"
+    assert _get(server, url, Range="bytes=a-b")[0] == 200
+    # A range for an older version of the file gets the whole current file
+    status, _, body = _get(server, url, Range="bytes=0-9", **{"If-Range": '"stale"'})
+    assert status == 200 and body == DATA
+    assert _get(server, url, Range="bytes=0-9", **{"If-Range": f'"{digest}"'})[0] == 206
@@ -0,0 +1,98 @@
+import io
+import json
+import threading
+import time
+
+from generation import (ContentGenerator, GenerationRequest, LocalStubBackend, OpenAICompatibleBackend,
+                        bullets_request, summary_request)
+
+DATA = {"job_role": "Engineer", "skills": "Python, SQL",
+        "experience": [{"position": "Developer", "company": "Acme", "description": "fixed bugs."}]}
+
+
+class CountingBackend(LocalStubBackend):
+    def __init__(self):
+        super().__init__(token_delay=0.005)
+        self.streams = 0
+        self.batches = 0
+
+    def stream(self, request):
+        self.streams += 1
+        yield from super().stream(request)
+
+    def generate_batch(self, requests):
+        self.batches += 1
+        return super().generate_batch(requests)
+
+
+def test_stub_skips_notes_that_are_only_punctuation():
+    for description in (".", "..\n.", " . \nfixed bugs."):
+        exp = dict(DATA["experience"][0], description=description)
+        bullets = LocalStubBackend().generate(bullets_request(DATA, exp)).split("\n")
+        assert len(bullets) == 4 and all(bullets)
+
+
+def test_concurrent_identical_streams_share_one_backend_call():
+    backend = CountingBackend()
+    generator = ContentGenerator(backend)
+    request = bullets_request(DATA, DATA["experience"][0])
+    texts = []
+    threads = [threading.Thread(target=lambda: texts.append("".join(generator.stream(request)))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.streams == 1
+    assert len(set(texts)) == 1
+    assert texts[0].startswith("Fixed bugs, ")
+    # Finished drafts come from the response cache
+    assert "".join(generator.stream(request)) == texts[0]
+    assert generator.generate(request) == texts[0].strip()
+    assert backend.streams == 1 and backend.batches == 0
+
+
+def test_generate_uses_batcher():
+    backend = CountingBackend()
+    generator = ContentGenerator(backend)
+    assert generator.generate(summary_request(DATA)).startswith("Results-driven Engineer")
+    assert backend.batches == 1 and backend.streams == 0
+
+
+class SlowFirstBackend(LocalStubBackend):
+    def generate_batch(self, requests):
+        if any("slow" in request.prompt for request in requests):
+            time.sleep(0.5)
+        return super().generate_batch(requests)
+
+
+def test_slow_batch_does_not_hold_up_later_batches():
+    generator = ContentGenerator(SlowFirstBackend())
+    slow = generator.batcher.submit("slow", GenerationRequest("other", "slow prompt"))
+    time.sleep(0.05)
+    began = time.monotonic()
+    assert generator.generate(GenerationRequest("other", "fast prompt")) == "fast prompt"
+    assert time.monotonic() - began < 0.3
+    assert slow.result(timeout=2) == "slow prompt"
+
+
+def test_identical_request_joins_a_batch_already_sent():
+    backend = SlowFirstBackend()
+    generator = ContentGenerator(backend)
+    request = GenerationRequest("other", "slow prompt")
+    first = generator.batcher.submit("k", request)
+    time.sleep(0.1)
+    second = generator.batcher.submit("k", request)
+    assert first.result(timeout=2) == second.result(timeout=2) == "slow prompt"
+    assert generator.batcher.batches == 1
+
+
+def test_openai_stream_skips_chunks_without_choices():
+    backend = OpenAICompatibleBackend(base_url="http://127.0.0.1:9", api_key="", model="m")
+    chunks = [{"choices": [{"delta": {"role": "assistant"}}]},
+              {"choices": [{"delta": {"content": "Hello "}}]},
+              {"choices": [{"delta": {"content": "world"}}]},
+              {"choices": [], "usage": {"total_tokens": 3}},
+              {"choices": [{"delta": {}, "finish_reason": "stop"}]}]
+    body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+    backend._post = lambda request, stream: io.BytesIO(body.encode("utf-8"))
+    assert "".join(backend.stream(GenerationRequest("summary", "hi"))) == "Hello world"
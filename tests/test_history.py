@@ -0,0 +1,102 @@
+import copy
+
+import pytest
+
+from history import VersionStore, apply, describe_changes, diff, user_key
+
+BASE = {
+    "name": "Ann Lee",
+    "email": "ann@example.com",
+    "summary": "Engineer with ten years of experience building reliable services.\n" * 4,
+    "skills": "Python, SQL",
+    "experience": [
+        {"position": "Engineer", "company": "Acme", "description": "Built things\nFixed things\n" * 6},
+        {"position": "Intern", "company": "Initech", "description": ""},
+    ],
+    "education": [{"degree": "BSc", "institution": "State", "year": "2012", "gpa": ""}],
+}
+
+
+def _edit(**changes):
+    doc = copy.deepcopy(BASE)
+    doc.update(changes)
+    return doc
+
+
+CASES = [
+    BASE,
+    _edit(name="Ann B. Lee"),
+    _edit(skills="Python, SQL, Go"),
+    _edit(summary=BASE["summary"].replace("ten", "eleven")),
+    _edit(summary=BASE["summary"] + "Now leading a platform team.\n"),
+    _edit(summary="Rewritten from scratch."),
+    _edit(experience=BASE["experience"][:1]),
+    _edit(experience=BASE["experience"] + [{"position": "Lead", "company": "Globex", "description": "Led"}]),
+    _edit(experience=[]),
+    _edit(experience=list(reversed(BASE["experience"]))),
+    _edit(photo="ab" * 32),
+    {k: v for k, v in BASE.items() if k != "education"},
+    _edit(skills=["Python", "SQL"]),
+    _edit(education=None),
+    {},
+]
+
+
+@pytest.mark.parametrize("new", CASES)
+@pytest.mark.parametrize("old", [BASE, {}])
+def test_apply_diff_round_trips(old, new):
+    ops = diff(old, new)
+    assert apply(old, ops) == new
+    assert old == (BASE if old else {})  # apply() must not modify its input
+
+
+def test_diff_of_equal_documents_is_empty():
+    assert diff(BASE, copy.deepcopy(BASE)) == []
+    assert diff({"gpa": 1}, {"gpa": 1.0}) == [["set", ["gpa"], 1.0]]
+
+
+def test_long_text_edits_are_stored_as_splices():
+    ops = diff(BASE, CASES[4])
+    assert [op[0] for op in ops] == ["splice"]
+
+
+@pytest.mark.parametrize("snapshot_every", [1, 3, 10])
+def test_version_store_returns_every_saved_version(tmp_path, snapshot_every):
+    store = VersionStore(str(tmp_path), snapshot_every=snapshot_every)
+    user = user_key("secret")
+    saved = [doc for doc in CASES if doc]
+    for doc in saved:
+        store.save(user, doc)
+    assert store.latest_version(user) == len(saved)
+    for version, doc in enumerate(saved, 1):
+        assert store.get(user, version) == doc
+    # A fresh store reads the same history back from disk
+    assert VersionStore(str(tmp_path)).get(user) == saved[-1]
+
+
+def test_saving_an_unchanged_document_adds_no_version(tmp_path):
+    store = VersionStore(str(tmp_path))
+    assert store.save("u1", BASE) == 1
+    assert store.save("u1", copy.deepcopy(BASE)) == 1
+    assert store.versions("u1")[0]["kind"] == "snapshot"
+
+
+def test_cache_is_bounded(tmp_path):
+    store = VersionStore(str(tmp_path), max_cached=2)
+    for user in ("u1", "u2", "u3"):
+        store.save(user, BASE)
+        store.get(user)
+    assert list(store._cache) == ["u2", "u3"]
+    assert store.get("u1") == BASE
+
+
+def test_history_keys_do_not_reveal_the_secret():
+    assert user_key("secret") == user_key("secret")
+    assert user_key("secret") != user_key("Secret")
+    assert "secret" not in user_key("secret")
+
+
+def test_describe_changes_lists_fields():
+    changes = describe_changes(BASE, CASES[1])
+    assert changes == [("name", "Ann Lee", "Ann B. Lee")]
+    assert ("photo", None, "ab" * 32) in describe_changes(BASE, CASES[10])
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+from packet import write_packet
+from render_workers import WARMUP_DATA
+from template_registry import TemplateRegistry
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return TemplateRegistry().plans()
+
+
+def test_packet_of_valid_records(plans):
+    records = [WARMUP_DATA, {"template": "Modern", "data": dict(WARMUP_DATA, name="Second")}]
+    summary = write_packet(records, io.BytesIO(), plans)
+    assert summary["candidates"] == 2 and summary["pages"] >= 2
+
+
+@pytest.mark.parametrize("record, message", [
+    ([1], "Candidate 2 is not a JSON object"),
+    ({"data": [1]}, "Candidate 2: resume data is not a JSON object"),
+    ({"experience": "x"}, "Candidate 2: 'experience' must be a list of objects"),
+    ({"projects": ["x"]}, "Candidate 2: 'projects' must be a list of objects"),
+    ({"skills": ["a"]}, "Candidate 2: 'skills' must be text"),
+    ({"name": 5}, "Candidate 2: 'name' must be text"),
+    ({"name": None}, "Candidate 2: 'name' must be text"),
+    ({"name": "Ann", "education": [{"year": 2015}]}, r"Candidate 2 \(Ann\): 'education.year' must be text"),
+    ({"template": ["Modern"], "data": {}}, "Unknown template"),
+    ({"template": "Missing", "data": {}}, "Unknown template 'Missing' for candidate 2"),
+])
+def test_malformed_records_name_the_candidate(plans, record, message):
+    with pytest.raises(ValueError, match=message):
+        write_packet([WARMUP_DATA, record], io.BytesIO(), plans)
+
+
+def test_empty_packet(plans):
+    with pytest.raises(ValueError, match="no candidates"):
+        write_packet([], io.BytesIO(), plans)
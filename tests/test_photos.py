@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from photos import MASTER_SIZE, PhotoStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PhotoStore(root=str(tmp_path / "photos"), dpi=100, quality=80, max_upload_mb=1)
+
+
+def _encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _master(store, photo_id):
+    with Image.open(store._path(photo_id)) as image:
+        image.load()
+        return image
+
+
+def test_exif_orientation_is_applied(store):
+    # A landscape sensor image tagged "rotate 90" is stored upright, i.e. portrait
+    image = Image.new("RGB", (400, 200), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    master = _master(store, store.add(_encode(image, "JPEG", exif=exif.tobytes())))
+    assert master.size == (200, 400)
+
+
+def test_transparency_is_flattened_onto_white(store):
+    image = Image.new("RGBA", (100, 100), (0, 0, 0, 0))
+    image.paste((0, 0, 255, 255), (0, 0, 50, 100))
+    master = _master(store, store.add(_encode(image, "PNG")))
+    assert master.mode == "RGB"
+    assert all(c > 245 for c in master.getpixel((90, 50)))
+    red, green, blue = master.getpixel((10, 50))
+    assert blue > 200 and red < 40 and green < 40
+
+
+def test_large_uploads_are_downscaled(store):
+    image = Image.new("RGB", (MASTER_SIZE * 2, MASTER_SIZE), (10, 120, 10))
+    master = _master(store, store.add(_encode(image, "JPEG", quality=30)))
+    assert max(master.size) == MASTER_SIZE
+
+
+def test_same_bytes_give_the_same_id(store):
+    data = _encode(Image.new("RGB", (50, 50), (1, 2, 3)), "PNG")
+    photo_id = store.add(data)
+    assert store.add(data) == photo_id
+    assert len(photo_id) == 32 and store.exists(photo_id)
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image at all", b"\x89PNG\r\n\x1a\n" + b"\x00" * 64])
+def test_non_images_are_rejected(store, data):
+    with pytest.raises(ValueError, match="could not be read"):
+        store.add(data)
+
+
+def test_oversized_uploads_are_rejected(store):
+    with pytest.raises(ValueError, match="larger than 1 MB"):
+        store.add(b"\xff" * (1024 * 1024 + 1))
+
+
+@pytest.mark.parametrize("photo_id", ["../../etc/passwd", "ABCDEF" * 6, "0" * 31, None, 5, "0" * 32])
+def test_invalid_or_unknown_ids_are_refused(store, photo_id):
+    assert not store.exists(photo_id)
+    assert store.slot_path(photo_id, 30, 40) is None
+
+
+def test_slot_variants_match_the_slot_aspect_and_never_upscale(store):
+    photo_id = store.add(_encode(Image.new("RGB", (600, 600), (90, 90, 90)), "PNG"))
+    # 30 x 40 mm at 100 dpi is 118 x 157 px
+    with Image.open(store.slot_path(photo_id, 30, 40)) as variant:
+        assert variant.size == (118, 157)
+    # A slot bigger than the photo keeps the photo's resolution at the slot's aspect
+    with Image.open(store.slot_path(photo_id, 254, 508)) as variant:
+        assert variant.size == (300, 600)
+    assert store.slot_path(photo_id, 30, 40) == store.slot_path(photo_id, 30, 40)
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from render_cache import DirectoryTier, KVServer, KVTier, LocalLRU, RenderCache
+
+
+@pytest.fixture
+def kv_server():
+    server = KVServer(('127.0.0.1', 0), max_bytes=1000)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["dir", "kv"])
+def tier(request, tmp_path, kv_server):
+    if request.param == "dir":
+        return DirectoryTier(str(tmp_path / "shared"))
+    return KVTier('127.0.0.1', kv_server.server_address[1])
+
+
+def _slow_render(calls, value, seconds=0.2):
+    def render():
+        calls.append(value)
+        time.sleep(seconds)
+        return value
+    return render
+
+
+def _run(caches, key, render, per_cache=4):
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.get_or_render(key, render)))
+               for c in caches for _ in range(per_cache)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_local_lru_is_bounded_and_skips_oversized_values():
+    lru = LocalLRU(10)
+    lru.put('a', b'12345')
+    lru.put('b', b'12345')
+    lru.get('a')
+    lru.put('c', b'1')
+    assert lru.get('b') is None and lru.get('a') == b'12345' and lru.size == 6
+    lru.put('big', b'x' * 11)
+    assert lru.get('big') is None and lru.get('a') == b'12345'
+
+
+def test_single_flight_across_threads_and_replicas(tier):
+    calls = []
+    replicas = [RenderCache(LocalLRU(1 << 20), tier, poll_interval=0.01) for _ in range(3)]
+    results = _run(replicas, 'k1', _slow_render(calls, b'pdf'))
+    assert calls == [b'pdf']
+    assert set(results) == {b'pdf'}
+    # Later lookups are local hits
+    assert replicas[0].get_or_render('k1', _slow_render(calls, b'other')) == b'pdf'
+    assert len(calls) == 1
+
+
+def test_render_errors_reach_every_waiter_and_free_the_lock(tier):
+    cache = RenderCache(LocalLRU(1 << 20), tier)
+
+    def boom():
+        time.sleep(0.1)
+        raise ValueError("bad template")
+    errors = []
+
+    def run():
+        try:
+            cache.get_or_render('k2', boom)
+        except ValueError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 4
+    assert tier.acquire('k2', 60)
+
+
+def test_lock_expires_after_ttl(tier):
+    assert tier.acquire('k3', 0.2)
+    assert not tier.acquire('k3', 0.2)
+    time.sleep(0.3)
+    assert tier.acquire('k3', 0.2)
+
+
+def test_release_only_frees_a_lock_still_owned(tier):
+    first = tier.acquire('k4', 0.1)
+    time.sleep(0.2)
+    second = tier.acquire('k4', 60)  # First owner overran the TTL; the lock is taken over
+    assert second and second != first
+    tier.release('k4', first)
+    assert not tier.acquire('k4', 60)
+    tier.release('k4', second)
+    assert tier.acquire('k4', 60)
+
+
+def test_overrunning_render_does_not_let_a_third_replica_in(tier):
+    calls = []
+    slow = RenderCache(LocalLRU(1 << 20), tier, lock_ttl=0.1, poll_interval=0.01)
+    taker = RenderCache(LocalLRU(1 << 20), tier, lock_ttl=5, poll_interval=0.01)
+    third = RenderCache(LocalLRU(1 << 20), tier, lock_ttl=5, poll_interval=0.01)
+    first = threading.Thread(target=lambda: slow.get_or_render('k5', _slow_render(calls, b'a', 0.3)))
+    first.start()
+    time.sleep(0.15)
+    second = threading.Thread(target=lambda: taker.get_or_render('k5', _slow_render(calls, b'b', 0.5)))
+    second.start()
+    first.join()
+    # The overrunning replica must not have released the lock it no longer owns
+    assert not tier.acquire('k5', 5)
+    second.join()
+    assert third.get_or_render('k5', _slow_render(calls, b'c')) in (b'a', b'b')
+    assert b'c' not in calls
+
+
+def test_kv_server_rejects_values_larger_than_the_cache(kv_server):
+    tier = KVTier('127.0.0.1', kv_server.server_address[1])
+    tier.put('small', b'x' * 500)
+    tier.put('huge', b'y' * 2000)
+    assert tier.get('huge') is None
+    assert tier.get('small') == b'x' * 500
+    tier.put('more', b'z' * 600)
+    assert tier.get('small') is None and kv_server.size == 600
+
+
+def test_directory_tier_expires_values(tmp_path):
+    tier = DirectoryTier(str(tmp_path), ttl=0.1)
+    tier.put('k6', b'pdf')
+    assert tier.get('k6') == b'pdf'
+    time.sleep(0.2)
+    assert tier.get('k6') is None
+    tier.purge_expired()
+    assert not list(tmp_path.rglob('k6.bin'))
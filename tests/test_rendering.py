@@ -0,0 +1,44 @@
+import re
+import time
+
+import pytest
+
+from render_workers import WARMUP_DATA
+from rendering import PDF_CREATION_DATE, generate_resume, render_pdf_bytes, resume_digest
+from template_registry import TemplateRegistry
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return TemplateRegistry().plans()
+
+
+def _document_id(pdf):
+    return re.search(rb"/ID \[<([0-9A-F]+)><\1>\]", pdf).group(1).decode()
+
+
+def test_every_template_renders_byte_identical_output(plans):
+    first = {name: render_pdf_bytes(plan, WARMUP_DATA) for name, plan in plans.items()}
+    time.sleep(1.1)  # A wall-clock timestamp would now differ
+    for name, plan in plans.items():
+        assert render_pdf_bytes(plan, dict(WARMUP_DATA)) == first[name], name
+    assert len(set(first.values())) == len(plans)
+
+
+def test_metadata_is_pinned_and_id_comes_from_the_inputs(plans):
+    plan = plans["Modern"]
+    pdf = render_pdf_bytes(plan, WARMUP_DATA)
+    assert PDF_CREATION_DATE.strftime("D:%Y%m%d%H%M%S").encode() in pdf
+    assert _document_id(pdf) == resume_digest(plan, WARMUP_DATA)[:32].upper()
+    other = render_pdf_bytes(plan, dict(WARMUP_DATA, name="Someone Else"))
+    assert _document_id(other) != _document_id(pdf)
+
+
+def test_digest_ignores_key_order(plans):
+    reordered = dict(reversed(list(WARMUP_DATA.items())))
+    assert resume_digest(plans["Minimal"], reordered) == resume_digest(plans["Minimal"], WARMUP_DATA)
+
+
+def test_non_deterministic_mode_has_no_fixed_id(plans):
+    pdf = generate_resume(plans["Professional"], WARMUP_DATA, deterministic=False)
+    assert pdf.document_id is None
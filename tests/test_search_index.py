@@ -0,0 +1,112 @@
+import pytest
+
+from search_index import FACET_FIELDS, FIELDS, MAX_EXPANSIONS, QueryError, SearchIndex
+
+RESUMES = {
+    "ann": {"name": "Ann Lee", "job_role": "Data Engineer", "skills": "Python, AWS, SQL",
+            "experience": [{"position": "Engineer", "company": "Acme Corp", "description": "Built pipelines"}]},
+    "bob": {"name": "Bob Diaz", "job_role": "Backend Developer", "skills": "Java, GCP, Kubernetes",
+            "experience": [{"position": "Developer", "company": "Globex", "description": "Ran kubectl daily"}]},
+    "cat": {"name": "Cat Wu", "job_role": "Machine Learning Intern", "skills": "Python, GCP",
+            "education": [{"degree": "MSc Machine Learning", "institution": "State University"}]},
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    for user, data in RESUMES.items():
+        index.index_resume(user, data)
+    return index
+
+
+def _users(index, query, filters=None):
+    return sorted(r["user"] for r in index.search(query, filters)["results"])
+
+
+@pytest.mark.parametrize("query, tree", [
+    ("python", ('terms', [("python", None, False)])),
+    ("kube*", ('terms', [("kube", None, True)])),
+    ("skills:python", ('terms', [("python", FIELDS["skills"], False)])),
+    ("role:engineer", ('terms', [("engineer", FIELDS["job_role"], False)])),
+    ('company:"acme corp"', ('terms', [("acme", FIELDS["company"], False), ("corp", FIELDS["company"], False)])),
+    ("x y", ('and', ('terms', [("x", None, False)]), ('terms', [("y", None, False)]))),
+    ("x AND y", ('and', ('terms', [("x", None, False)]), ('terms', [("y", None, False)]))),
+    ("x or y", ('or', ('terms', [("x", None, False)]), ('terms', [("y", None, False)]))),
+    ("-x", ('not', ('terms', [("x", None, False)]))),
+    ("NOT x", ('not', ('terms', [("x", None, False)]))),
+    ("x y OR z", ('or', ('and', ('terms', [("x", None, False)]), ('terms', [("y", None, False)])),
+                  ('terms', [("z", None, False)]))),
+    ("x (y OR z)", ('and', ('terms', [("x", None, False)]),
+                    ('or', ('terms', [("y", None, False)]), ('terms', [("z", None, False)])))),
+    ("unknown:word", ('terms', [("unknown", None, False), ("word", None, False)])),
+])
+def test_parse(tmp_path, query, tree):
+    assert SearchIndex(str(tmp_path / "search.sqlite3"))._parse(query) == tree
+
+
+@pytest.mark.parametrize("query, message", [
+    ('"machine learning', "Unbalanced quotes"),
+    ("(python", "Missing closing parenthesis"),
+    ("python)", r"Unexpected '\)'"),
+    (")", "Unexpected closing parenthesis"),
+    ("python OR", "Query ends unexpectedly"),
+    ("NOT", "Query ends unexpectedly"),
+    ("skills:***", "Nothing to search for"),
+])
+def test_parse_errors(tmp_path, query, message):
+    with pytest.raises(QueryError, match=message):
+        SearchIndex(str(tmp_path / "search.sqlite3"))._parse(query)
+
+
+@pytest.mark.parametrize("query, users", [
+    ("python", ["ann", "cat"]),
+    ("PYTHON and gcp", ["cat"]),
+    ("python -intern", ["ann"]),
+    ("python NOT intern", ["ann"]),
+    ("java OR aws", ["ann", "bob"]),
+    ("(aws OR gcp) python", ["ann", "cat"]),
+    ("kube*", ["bob"]),
+    ('"machine learning"', ["cat"]),
+    ("degree:machine", ["cat"]),
+    ("skills:machine", []),
+    ("company:globex", ["bob"]),
+    ("nobody", []),
+])
+def test_search(index, query, users):
+    assert _users(index, query) == users
+
+
+def test_filters_combine_with_queries(index):
+    assert _users(index, "", {"skills": ["GCP"]}) == ["bob", "cat"]
+    assert _users(index, "python", {"skills": ["GCP"]}) == ["cat"]
+    assert _users(index, "", {"skills": ["GCP", "AWS"], "job_role": ["Data Engineer"]}) == ["ann"]
+
+
+def test_reindexing_replaces_old_terms(index):
+    index.index_resume("bob", dict(RESUMES["bob"], skills="Rust"))
+    assert _users(index, "java") == []
+    assert _users(index, "rust") == ["bob"]
+    index.remove("bob")
+    assert _users(index, "rust") == []
+    assert index.search("")["total"] == 2
+
+
+def test_bare_prefix_counts_only_text_words(tmp_path):
+    # Every company is also a facet value; those must not count toward the expansion limit
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    experience = [{"position": "Engineer", "company": f"Zeta {i}"} for i in range(MAX_EXPANSIONS + 10)]
+    index.index_resume("ann", {"name": "Ann", "experience": experience})
+    assert _users(index, "zet*") == ["ann"]
+    assert _users(index, "company:zet*") == ["ann"]
+    # Expanding within the facet field itself still sees them all
+    with pytest.raises(QueryError, match="too many words"):
+        index._expand("zeta", FACET_FIELDS["company"])
+
+
+def test_opening_an_index_loads_existing_docs(index):
+    reopened = SearchIndex(index.path)
+    assert len(reopened._updated) == len(RESUMES) and reopened._seq
+    assert _users(reopened, "", {"skills": ["GCP"]}) == ["bob", "cat"]
+    index.index_resume("dan", {"name": "Dan", "skills": "GCP"})
+    assert _users(reopened, "", {"skills": ["GCP"]}) == ["bob", "cat", "dan"]
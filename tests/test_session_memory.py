@@ -0,0 +1,89 @@
+import os
+import time
+
+from session_memory import MemoryGovernor, approx_size
+
+KB = 1024
+
+
+def _governor(tmp_path, **kwargs):
+    kwargs.setdefault("session_cap", 100 * KB)
+    kwargs.setdefault("process_budget", 250 * KB)
+    kwargs.setdefault("idle_timeout", 3600)
+    return MemoryGovernor(spill_dir=str(tmp_path / "spill"), **kwargs)
+
+
+def test_put_and_get_round_trip(tmp_path):
+    governor = _governor(tmp_path)
+    governor.put("s1", "pdf", b"%PDF" * 10)
+    governor.put("s1", "html", "<div>preview</div>")
+    assert governor.get("s1", "pdf") == b"%PDF" * 10
+    assert governor.get("s1", "html") == "<div>preview</div>"
+    assert governor.get("s1", "missing") is None
+    assert governor.session_bytes("s1") == approx_size(b"%PDF" * 10) + approx_size("<div>preview</div>")
+
+
+def test_session_cap_spills_least_recently_used_and_reloads(tmp_path):
+    governor = _governor(tmp_path)
+    governor.put("s1", "old", b"a" * 60 * KB)
+    time.sleep(0.01)
+    governor.put("s1", "new", b"b" * 60 * KB)
+    metrics = governor.metrics()
+    assert metrics["spills"] == 1 and metrics["spilled_bytes"] > 60 * KB
+    assert governor.session_bytes("s1") < 100 * KB
+    # A spilled artifact comes back from disk intact
+    assert governor.get("s1", "old") == b"a" * 60 * KB
+    assert governor.metrics()["spill_reloads"] == 1
+
+
+def test_process_budget_spills_idle_sessions_first(tmp_path):
+    governor = _governor(tmp_path)
+    for sid in ("s1", "s2", "s3"):
+        governor.put(sid, "pdf", b"x" * 90 * KB)
+        time.sleep(0.01)
+    governor.put("s4", "pdf", b"y" * 90 * KB)
+    assert governor.metrics()["resident_bytes"] <= 250 * KB
+    assert governor.session_bytes("s1") == 0
+    assert governor.session_bytes("s4") > 0
+
+
+def test_accounted_data_is_reported_but_never_pressure(tmp_path):
+    governor = _governor(tmp_path)
+    user_data = {"summary": "s" * 200 * KB}
+    for sid in ("s1", "s2"):
+        governor.account(sid, "user_data", user_data)
+    governor.put("s3", "pdf", b"x" * 90 * KB)
+    # Accounted bytes are far over the budget, yet the artifact stays resident
+    metrics = governor.metrics()
+    assert metrics["accounted_bytes"] == 2 * approx_size(user_data)
+    assert metrics["resident_bytes"] == governor.session_bytes("s3")
+    assert metrics["evictions"] == 0
+    assert governor.session_bytes("s1") == 0
+    assert governor.session_accounted_bytes("s1") == approx_size(user_data)
+
+
+def test_idle_sessions_are_dropped_and_only_freed_bytes_reported(tmp_path):
+    governor = _governor(tmp_path, idle_timeout=0.05)
+    governor.account("idle", "user_data", {"summary": "s" * 10 * KB})
+    governor.put("idle", "pdf", b"x" * 20 * KB)
+    governor.put("spilled", "pdf", b"z" * 20 * KB)
+    governor._spill("spilled", "pdf", governor._sessions["spilled"].entries["pdf"])
+    spill_files = os.listdir(tmp_path / "spill")
+    time.sleep(0.1)
+    governor.touch("active")
+    governor.sweep()
+    metrics = governor.metrics()
+    assert metrics["sessions"] == 1
+    assert metrics["idle_session_evictions"] == 2
+    assert metrics["idle_bytes_reclaimed"] == approx_size(b"x" * 20 * KB)
+    assert len(spill_files) == 1 and not os.listdir(tmp_path / "spill")
+
+
+def test_drop_session_removes_spill_files(tmp_path):
+    governor = _governor(tmp_path, session_cap=10 * KB)
+    governor.put("s1", "a", b"a" * 8 * KB)
+    governor.put("s1", "b", b"b" * 8 * KB)
+    assert os.listdir(tmp_path / "spill")
+    governor.drop_session("s1")
+    assert not os.listdir(tmp_path / "spill")
+    assert governor.get("s1", "a") is None
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from render_workers import WARMUP_DATA
+from rendering import resume_digest
+from template_registry import TEMPLATE_DIR, TemplateRegistry, compile_template
+
+
+def _definition(name="minimal.json"):
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(path, definition):
+    # Moves the mtime forward so edits within one timestamp tick are still seen
+    mtime = os.stat(path).st_mtime + 5 if path.exists() else None
+    path.write_text(definition if isinstance(definition, str) else json.dumps(definition), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    shutil.copy(os.path.join(TEMPLATE_DIR, "minimal.json"), tmp_path / "minimal.json")
+    return tmp_path
+
+
+def test_shipped_templates_compile():
+    registry = TemplateRegistry(poll_interval=0)
+    assert list(registry.plans()) == ["Professional", "Modern", "Creative", "Minimal", "Executive"]
+    assert registry.errors == {}
+
+
+def test_version_is_a_content_hash():
+    definition = _definition()
+    plan = compile_template(definition)
+    assert compile_template(dict(reversed(list(definition.items())))).version == plan.version
+    definition["layout"]["name_size"] += 1
+    edited = compile_template(definition)
+    assert edited.version != plan.version
+    assert resume_digest(edited, WARMUP_DATA) != resume_digest(plan, WARMUP_DATA)
+
+
+def test_edited_file_is_reloaded_as_a_new_plan(template_dir):
+    registry = TemplateRegistry(str(template_dir), poll_interval=0)
+    old = registry.get("Minimal")
+    generation = registry.generation
+    registry.plans()
+    assert registry.generation == generation  # Unchanged files are not recompiled
+    definition = _definition()
+    definition["color"] = "#112233"
+    _write(template_dir / "minimal.json", definition)
+    new = registry.get("Minimal")
+    assert new is not old and new.version != old.version and new.color_rgb == (0x11, 0x22, 0x33)
+    assert old.color == "#95A5A6"  # Renders already holding the old plan keep it
+
+
+def test_poll_interval_limits_directory_checks(template_dir):
+    registry = TemplateRegistry(str(template_dir), poll_interval=3600)
+    _write(template_dir / "extra.json", dict(_definition(), name="Extra"))
+    assert list(registry.plans()) == ["Minimal"]
+    registry.refresh()
+    assert sorted(registry.plans()) == ["Extra", "Minimal"]
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda d: d.update(builder="fancy"), "Unknown builder"),
+    (lambda d: d.update(color="red"), "#RRGGBB"),
+    (lambda d: d.pop("layout"), "Missing 'layout'"),
+    (lambda d: d["layout"].update(font="Comic Sans"), "Font must be one of"),
+    (lambda d: d["layout"].update(name_size="big"), "'name_size' has the wrong type"),
+    (lambda d: d["layout"].update(rule_color=[1, 2]), "'rule_color' must be an"),
+    (lambda d: d["layout"].update(extra=1), "unknown: \\['extra'\\]"),
+    (lambda d: d["layout"]["headings"].pop("skills"), "'headings' must map exactly"),
+])
+def test_invalid_definitions_are_rejected(change, message):
+    definition = _definition()
+    change(definition)
+    with pytest.raises(ValueError, match=message):
+        compile_template(definition)
+
+
+def test_broken_edit_keeps_the_last_good_plan(template_dir):
+    registry = TemplateRegistry(str(template_dir), poll_interval=0)
+    good = registry.get("Minimal")
+    _write(template_dir / "minimal.json", "{not json")
+    assert registry.get("Minimal") is good
+    assert str(template_dir / "minimal.json") in registry.errors
+    # Fixing the file clears the error
+    _write(template_dir / "minimal.json", _definition())
+    assert registry.get("Minimal").version == good.version
+    assert registry.errors == {}
+
+
+def test_duplicate_names_keep_the_first_and_report_the_second(template_dir):
+    _write(template_dir / "copy.json", dict(_definition(), order=9))
+    registry = TemplateRegistry(str(template_dir), poll_interval=0)
+    assert registry.get("Minimal").source == str(template_dir / "minimal.json")
+    assert "already used" in registry.errors[str(template_dir / "copy.json")]
+    with pytest.raises(KeyError, match="Unknown template"):
+        registry.get("Nope")
@@ -0,0 +1,53 @@
+import pytest
+from fpdf import FPDF
+
+from textlayout import text_block
+
+LONG = ("Led the migration of twelve legacy services to a shared platform, cutting deployment time "
+        "from days to minutes while keeping every customer-facing system online")
+
+TEXTS = [
+    "",
+    "Short line",
+    LONG,
+    LONG + "\n" + LONG,
+    "First paragraph\n\nThird paragraph after a blank line",
+    "Ends with a newline\n",
+    "Windows\r\nline endings\r\n",
+    "Pneumonoultramicroscopicsilicovolcanoconiosis" * 4,
+    "Before " + "x" * 300 + " after",
+    "Double  spaces   between    words " * 6,
+    " Leading and trailing spaces ",
+    "Accents café naïve résumé " * 8,
+]
+
+
+def _page(write, font=('Arial', '', 11)):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font(*font)
+    write(pdf)
+    return pdf.pages[1], pdf.x, pdf.y
+
+
+@pytest.mark.parametrize("align", ['J', 'L', 'C', 'R'])
+@pytest.mark.parametrize("text", TEXTS)
+def test_text_block_matches_multi_cell(text, align):
+    expected = _page(lambda pdf: pdf.multi_cell(0, 5, text, 0, align))
+    assert _page(lambda pdf: text_block(pdf, 0, 5, text, 0, align)) == expected
+
+
+@pytest.mark.parametrize("width", [40, 95, 150])
+def test_text_block_matches_multi_cell_at_fixed_widths(width):
+    for text in TEXTS:
+        expected = _page(lambda pdf: pdf.multi_cell(width, 6, text), ('Times', 'B', 12))
+        assert _page(lambda pdf: text_block(pdf, width, 6, text), ('Times', 'B', 12)) == expected
+
+
+def test_justified_paragraph_resets_word_spacing():
+    # A justified paragraph followed by a short line must not leak its word spacing
+    def write(pdf, block):
+        block(pdf, 0, 5, LONG)
+        pdf.cell(0, 5, "after the paragraph", 0, 1)
+    expected = _page(lambda pdf: write(pdf, FPDF.multi_cell))
+    assert _page(lambda pdf: write(pdf, text_block)) == expected
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+
+# Per-font state shared by every render in the process
+_width_tables = {}
+_word_widths = {}
+_layouts = OrderedDict()
+_layouts_lock = threading.Lock()
+MAX_WORDS_PER_FONT = 50000
+MAX_LAYOUTS = 8192
+
+
+def _width_table(font):
+    # Core-font widths as a flat list indexed by character code; characters
+    # outside the table measure 0, as in FPDF.get_string_width
+    table = _width_tables.get(font['name'])
+    if table is None:
+        cw = font['cw']
+        table = [cw.get(chr(i), 0) for i in range(256)]
+        _width_tables[font['name']] = table
+    return table
+
+def word_width(font, word):
+    cache = _word_widths.get(font['name'])
+    if cache is None:
+        cache = _word_widths[font['name']] = {}
+    width = cache.get(word)
+    if width is None:
+        table = _width_table(font)
+        width = 0
+        for char in word:
+            code = ord(char)
+            if code < 256:
+                width += table[code]
+        if len(cache) >= MAX_WORDS_PER_FONT:
+            cache.clear()
+        cache[word] = width
+    return width
+
+def _split_word(font, word, room):
+    # Index of the first character whose cumulative width exceeds `room`
+    table = _width_table(font)
+    width = 0
+    for i, char in enumerate(word):
+        code = ord(char)
+        width += table[code] if code < 256 else 0
+        if width > room:
+            return i
+    return len(word)
+
+def _break_paragraph(font, text, wmax, lines):
+    # Greedy breaking with exactly FPDF.multi_cell's rules, measured a word at a time.
+    # Each line is (text, width, interior_spaces, soft) where soft lines ended at a space.
+    space = _width_table(font)[32]
+    n = len(text)
+    i = j = 0
+    width = 0
+    sep = -1
+    sep_width = 0
+    spaces = 0
+    while i < n:
+        if text[i] == ' ':
+            sep, sep_width = i, width
+            spaces += 1
+            width += space
+            if width > wmax:
+                lines.append((text[j:sep], sep_width, spaces - 1, True))
+                i = j = sep + 1
+                width, sep, spaces = 0, -1, 0
+            else:
+                i += 1
+            continue
+        end = text.find(' ', i)
+        if end == -1:
+            end = n
+        word = text[i:end]
+        w = word_width(font, word)
+        if width + w <= wmax:
+            width += w
+            i = end
+            continue
+        if sep != -1:
+            lines.append((text[j:sep], sep_width, spaces - 1, True))
+            i = j = sep + 1
+        else:
+            # Single word wider than the line: break it between characters
+            i += _split_word(font, word, wmax - width)
+            if i == j:
+                i += 1
+            lines.append((text[j:i], 0, 0, False))
+            j = i
+        width, sep, spaces = 0, -1, 0
+    lines.append((text[j:n], width, 0, False))
+
+def layout_lines(font, wmax, text):
+    key = (font['name'], wmax, text)
+    with _layouts_lock:
+        lines = _layouts.get(key)
+        if lines is not None:
+            _layouts.move_to_end(key)
+            return lines
+    s = text.replace('\r', '')
+    if s.endswith('\n'):
+        s = s[:-1]
+    lines = []
+    for paragraph in s.split('\n'):
+        _break_paragraph(font, paragraph, wmax, lines)
+    lines = tuple(lines)
+    with _layouts_lock:
+        _layouts[key] = lines
+        while len(_layouts) > MAX_LAYOUTS:
+            _layouts.popitem(last=False)
+    return lines
+
+def text_block(pdf, w, h, txt='', border=0, align='J'):
+    # Drop-in replacement for pdf.multi_cell() using cached widths and line breaks.
+    # Output is byte-identical to multi_cell for core fonts without borders.
+    if border or pdf.unifontsubset:
+        return pdf.multi_cell(w, h, txt, border, align)
+    if w == 0:
+        w = pdf.w - pdf.r_margin - pdf.x
+    wmax = (w - 2 * pdf.c_margin) * 1000.0 / pdf.font_size
+    for line, width, spaces, soft in layout_lines(pdf.current_font, wmax, txt):
+        if soft and align == 'J':
+            pdf.ws = (wmax - width) / 1000.0 * pdf.font_size / spaces if spaces > 0 else 0
+            pdf._out('%.3f Tw' % (pdf.ws * pdf.k))
+        elif pdf.ws > 0:
+            pdf.ws = 0
+            pdf._out('0 Tw')
+        pdf.cell(w, h, line, 0, 2, align)
+    pdf.x = pdf.l_margin